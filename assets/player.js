@@ -7,6 +7,8 @@
   var ytPlayer = null;      // YouTube player instance
   var ytReady = false;
   var ytPendingSeek = null;
+  // site root, from this script's own URL (assets/player.js)
+  var SITE_ROOT = ((document.currentScript && document.currentScript.src) || '').replace(/assets\/player\.js([?#].*)?$/, '');
 
   window.KloomPlayer = {
     load:          load,
@@ -192,9 +194,52 @@
         '<span class="kp-time" id="kp-time">0:00 / 0:00</span>' +
       '</div>';
     document.getElementById('kp-progress').addEventListener('click', seek);
+    loadWaveform();
     syncBtn();
   }
 
+  /* Waveform peaks precomputed by generate.py: assets/waveforms/<id>-<n>.bin
+     holds n interleaved (min, max) int8 pairs.  The smallest file that covers
+     the bar's device pixels is fetched; if there is none the plain bar stays. */
+  var WAVE_RESOLUTIONS = [256, 1024, 4096];
+
+  function loadWaveform() {
+    var bar = document.getElementById('kp-progress');
+    if (!bar || !window.fetch || !SITE_ROOT) return;
+    var px = bar.clientWidth * (window.devicePixelRatio || 1);
+    var n = WAVE_RESOLUTIONS[WAVE_RESOLUTIONS.length - 1];
+    for (var i = 0; i < WAVE_RESOLUTIONS.length; i++) {
+      if (WAVE_RESOLUTIONS[i] >= px) { n = WAVE_RESOLUTIONS[i]; break; }
+    }
+    var id = state.id;
+    var url = SITE_ROOT + 'assets/waveforms/' + id + '-' + n + '.bin';
+    fetch(url).then(function (r) {
+      return r.ok ? r.arrayBuffer() : null;
+    }).then(function (buf) {
+      if (buf && state && state.id === id) drawWaveform(new Int8Array(buf));
+    }).catch(function () { /* no waveform: keep the plain bar */ });
+  }
+
+  function drawWaveform(peaks) {
+    var bar = document.getElementById('kp-progress');
+    if (!bar || peaks.length < 2) return;
+    bar.classList.add('kp-has-wave');
+    var canvas = document.createElement('canvas');
+    canvas.className = 'kp-wave';
+    var dpr = window.devicePixelRatio || 1;
+    canvas.width = Math.max(1, Math.round(bar.clientWidth * dpr));
+    canvas.height = Math.max(1, Math.round(bar.clientHeight * dpr));
+    bar.insertBefore(canvas, bar.firstChild);
+    var ctx = canvas.getContext('2d');
+    var buckets = peaks.length / 2, mid = canvas.height / 2, scale = mid / 127;
+    ctx.fillStyle = '#00aa00';
+    for (var x = 0; x < canvas.width; x++) {
+      var b = Math.floor(x * buckets / canvas.width) * 2;
+      var top = mid - peaks[b + 1] * scale, bottom = mid - peaks[b] * scale;
+      ctx.fillRect(x, top, 1, Math.max(1, bottom - top));
+    }
+  }
+
   /* ── private: Mixcloud ───────────────────────────── */
 
   function renderMixcloud(seekTo) {
@@ -420,31 +465,138 @@
 })();
 
 /* ── Client-side search ──────────────────────────── */
+/* Queries the sharded prefix index written by generate_search_index():
+   only the manifest, the id table and the shards for the typed words load.
+   A site built before search/ existed still has search-index.json (one
+   record per show), which is searched by substring instead. */
 (function () {
   var input = document.getElementById('kloom-search');
   if (!input) return;
 
-  var shows = [];
-  fetch('search-index.json')
-    .then(function (r) { return r.json(); })
-    .then(function (d) { shows = d; })
-    .catch(function () {});
+  var base = input.getAttribute('data-search-base') || 'search/';
+  var FINALS = { 'ך': 'כ', 'ם': 'מ', 'ן': 'נ', 'ף': 'פ', 'ץ': 'צ' };
+  var manifest = null, docs = null, shards = {};
 
-  input.addEventListener('input', function (e) {
-    var q = e.target.value.toLowerCase().trim();
+  function getJSON(url) {
+    return fetch(url).then(function (r) {
+      if (!r.ok) throw new Error(url + ': HTTP ' + r.status);
+      return r.json();
+    });
+  }
 
-    /* toggle section headers */
-    document.querySelectorAll('.section-header').forEach(function (h) {
-      h.style.display = q ? 'none' : '';
+  function ready() {
+    if (!manifest) {
+      manifest = getJSON(base + 'manifest.json').then(function (m) {
+        return getJSON(base + m.docs).then(function (d) { docs = d; return m; });
+      }, legacyIndex);
+    }
+    return manifest;
+  }
+
+  /* search-index.json sits next to search/; generate.py removes it once search/ is built */
+  function legacyIndex() {
+    return getJSON(base + '../search-index.json').then(function (shows) {
+      return { legacy: shows.map(function (s) {
+        return { doc: [s.id, s.title, s.series, s.date || ''],
+                 text: normalize([s.title, s.description, s.series, s.guest || '', (s.tags || []).join(' ')].join(' ')) };
+      }) };
     });
+  }
+
+  /* keep in sync with normalize_search_text() / search_tokens() in generate.py */
+  function normalize(s) {
+    return s.toLowerCase().normalize('NFKD').replace(/\p{M}/gu, '')
+            .replace(/[ךםןףץ]/g, function (c) { return FINALS[c]; });
+  }
+
+  function tokens(q, maxToken) {
+    var words = normalize(q).replace(/['"׳״]/g, '').match(/[\p{L}\p{N}]+/gu) || [];
+    return words.map(function (w) { return w.slice(0, maxToken); });
+  }
 
-    document.querySelectorAll('.show-item').forEach(function (card) {
-      if (!q) { card.style.display = ''; return; }
-      var id = card.id.replace('card-', '');
-      var show = shows.find(function (s) { return s.id === id; });
-      if (!show) { card.style.display = 'none'; return; }
-      var haystack = [show.title, show.description, show.series, show.guest || '', show.tags.join(' ')].join(' ').toLowerCase();
-      card.style.display = haystack.indexOf(q) !== -1 ? '' : 'none';
+  function shardFor(m, term) {
+    for (var n = term.length; n > 0; n--) {
+      var key = term.slice(0, n);
+      if (m.shards[key]) return m.shards[key];
+    }
+    return m.shards[''] || null;
+  }
+
+  function postings(m, term) {
+    var file = shardFor(m, term);
+    if (!file) return Promise.resolve([]);
+    if (!shards[file]) shards[file] = getJSON(base + file);
+    return shards[file].then(function (shard) {
+      var ids = [], acc = 0;
+      (shard[term] || []).forEach(function (gap) { acc += gap; ids.push(acc); });
+      return ids;
     });
+  }
+
+  function search(q) {
+    return ready().then(function (m) {
+      if (m.legacy) {
+        var words = tokens(q, Infinity), found = {};
+        m.legacy.forEach(function (s) {
+          if (words.every(function (w) { return s.text.indexOf(w) !== -1; })) found[s.doc[0]] = s.doc;
+        });
+        return found;
+      }
+      var terms = tokens(q, m.max_token);
+      return Promise.all(terms.map(function (t) { return postings(m, t); })).then(function (lists) {
+        var hits = null;
+        lists.forEach(function (ids) {
+          var set = {};
+          ids.forEach(function (i) { if (!hits || hits[docs[i][0]]) set[docs[i][0]] = docs[i]; });
+          hits = set;
+        });
+        return hits || {};
+      });
+    });
+  }
+
+  /* hits whose card is not on this (paginated) page are listed as links */
+  function renderOffPage(hits) {
+    var box = document.getElementById('kloom-search-results');
+    if (!box) {
+      box = document.createElement('div');
+      box.id = 'kloom-search-results';
+      box.className = 'nav-links';
+      input.parentNode.insertAdjacentElement('afterend', box);
+    }
+    box.textContent = '';
+    Object.keys(hits).forEach(function (id) {
+      if (document.getElementById('card-' + id)) return;
+      var doc = hits[id], a = document.createElement('a');
+      a.href = 'shows/' + encodeURIComponent(id) + '.html';
+      a.textContent = doc[2] + ' // ' + doc[3] + ' — ' + doc[1];
+      box.appendChild(a);
+    });
+    box.style.display = box.childNodes.length ? '' : 'none';
+  }
+
+  input.addEventListener('input', function (e) {
+    var q = e.target.value.trim();
+
+    if (!q) {
+      document.querySelectorAll('.section-header').forEach(function (h) { h.style.display = ''; });
+      document.querySelectorAll('.show-item').forEach(function (card) { card.style.display = ''; });
+      renderOffPage({});
+      return;
+    }
+
+    search(q).then(function (hits) {
+      if (input.value.trim() !== q) return;  /* a newer query is in flight */
+
+      /* toggle section headers */
+      document.querySelectorAll('.section-header').forEach(function (h) {
+        h.style.display = 'none';
+      });
+
+      document.querySelectorAll('.show-item').forEach(function (card) {
+        card.style.display = hits[card.id.replace('card-', '')] ? '' : 'none';
+      });
+      renderOffPage(hits);
+    }).catch(function () {});
   });
 })();
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+bench_generate.py  ─  synthetic-archive benchmark for generate.py  ─  Kloom Lo Kadosh
+
+  Run:       python3 bench_generate.py [--sizes 100,1000,10000,100000] [--jobs N]
+  Baseline:  python3 bench_generate.py --save-baseline
+  Compare:   python3 bench_generate.py --baseline PATH [--threshold 0.2]
+
+Builds the site from generated archives of each size in a scratch copy of the
+repo (generate.py, kloom_store.py, templates/, assets/), so the real outputs
+and caches are never touched.  Every archive is built three times, each in a
+fresh process: a clean ``--full`` build, a no-op rebuild, and a rebuild after
+editing one show.  Builds run ``--offline``, so Mixcloud metadata and cover
+art come only from the (empty) caches and nothing reaches the network.
+
+Per-phase wall time, CPU time and peak memory come from generate.py's own
+``--profile`` report (tracemalloc is on, so absolute times run slower than a
+plain build; compare runs against each other).  OG images are skipped above
+``--og-limit`` shows, where they would take hours.
+
+Results go to .cache/bench-results.json; with a baseline present
+(.cache/bench-baseline.json by default) every phase slower or hungrier than
+the baseline by more than the threshold is reported, and the exit status is 1.
+"""
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import datetime
+from pathlib import Path
+
+BASE_DIR      = Path(__file__).resolve().parent
+CACHE_DIR     = BASE_DIR / '.cache'
+RESULTS_FILE  = CACHE_DIR / 'bench-results.json'
+BASELINE_FILE = CACHE_DIR / 'bench-baseline.json'
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+OG_LIMIT      = 10000    # larger archives skip the OG phase
+THRESHOLD     = 0.20     # slower / bigger than baseline by this much is a regression
+SEED          = 106
+
+# What a scratch tree needs to build; generated asset dirs are left behind
+TREE_FILES = ('generate.py', 'kloom_store.py')
+TREE_DIRS  = ('templates', 'assets')
+SKIP_ASSET_DIRS = ('og', 'waveforms', 'covers')
+
+# Phases worth comparing; the rest are too small to time meaningfully
+REPORT_PHASES = ('load', 'prepare', 'og_images', 'show_pages', 'listing_pages',
+                 'search_index', 'feeds', 'sitemap.xml', 'manifest')
+
+# ── synthetic archives ──
+
+SERIES = ('Nothing Is Holy', 'Kol Hazuti', 'You Are Not Holy', 'Kloom Lo Kadosh', 'Radio Art 106')
+LATIN  = ('noise', 'tape', 'loop', 'drone', 'static', 'signal', 'breakcore', 'ambient', 'field',
+          'recording', 'modular', 'feedback', 'dub', 'radio', 'voice', 'machine', 'ritual', 'night',
+          'broadcast', 'mixtape', 'archive', 'pirate', 'cassette', 'transmission', 'echo')
+HEBREW = ('רעש', 'קלטת', 'לולאה', 'רדיו', 'קול', 'לילה', 'שידור', 'מכונה', 'טקס', 'הד', 'ארכיון',
+          'אות', 'שקט', 'מוזיקה', 'ניסיוני', 'חזותי', 'קדוש', 'כלום', 'שיר', 'תדר')
+TAGS   = ('Mixtape', 'Hip Hop', 'Experimental', 'Noise', 'Ambient', 'Breakcore', 'Archive', 'Live',
+          'Hebrew', 'Field Recording', 'Drone', 'Dub', 'Techno', 'Jazz', 'Spoken Word', 'Radio Art',
+          'ניסיוני', 'רעש', 'שירה', 'הופעה חיה', 'אלקטרוני', 'פאנק', 'ג׳אז', 'דאב')
+
+def _words(rng, n):
+    pool = HEBREW if rng.random() < 0.4 else LATIN
+    return ' '.join(rng.choice(pool if rng.random() < 0.8 else LATIN + HEBREW) for _ in range(n))
+
+def synthetic_show(rng, i, start=datetime.date(2010, 1, 1)):
+    """One valid shows.json record; ids and dates are unique per index."""
+    date = (start + datetime.timedelta(days=i // 3)).isoformat()
+    show_id = f'bench-{i:06d}'
+    title = _words(rng, rng.randint(2, 9)).title()
+    paragraphs = [_words(rng, rng.randint(20, 120)) + '.' for _ in range(rng.randint(1, 5))]
+    if rng.random() < 0.3:
+        paragraphs.append('\n'.join(f'{_words(rng, 2).title()} - {_words(rng, 3)}'
+                                    for _ in range(rng.randint(5, 25))))
+    show = {
+        'id': show_id, 'title': title, 'series': rng.choice(SERIES), 'date': date,
+        'guest': _words(rng, 2).title() if rng.random() < 0.5 else '',
+        'tags': rng.sample(TAGS, rng.randint(3, 12)),
+        'description': '\n\n'.join(paragraphs),
+    }
+    if rng.random() < 0.1:
+        show.update(type='youtube', embed_url=f'https://www.youtube.com/embed/bench{i:06d}')
+    else:
+        feed = f'%2Fkloombench%2F{show_id}%2F'
+        show.update(type='embed',
+                    embed_url=f'https://player-widget.mixcloud.com/widget/iframe/?hide_cover=1&feed={feed}',
+                    image_url=f'https://thumbnailer.mixcloud.com/unsafe/600x600/bench/{show_id}',
+                    play_count=rng.randint(0, 5000))
+    return show
+
+def synthetic_archive(size, seed=SEED):
+    rng = random.Random(seed)
+    return [synthetic_show(rng, i) for i in range(size)]
+
+# ── scratch tree ──
+
+def make_tree(root, shows):
+    """Copy the buildable parts of the repo into `root` and write the archive."""
+    for name in TREE_FILES:
+        shutil.copy2(BASE_DIR / name, root / name)
+    for name in TREE_DIRS:
+        shutil.copytree(BASE_DIR / name, root / name,
+                        ignore=lambda d, names: SKIP_ASSET_DIRS if Path(d) == BASE_DIR / 'assets' else ())
+    (root / 'data').mkdir()
+    with open(root / 'data' / 'shows.json', 'w', encoding='utf-8') as f:
+        json.dump(shows, f, indent=4, ensure_ascii=False)
+
+def edit_one_show(root):
+    """Change one show's description, as an editor fixing a typo would."""
+    path = root / 'data' / 'shows.json'
+    with open(path, encoding='utf-8') as f:
+        shows = json.load(f)
+    shows[len(shows) // 2]['description'] += ' (edited)'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(shows, f, indent=4, ensure_ascii=False)
+
+# ── runs ──
+
+def _worker(root, options):
+    """Build the scratch tree in this process and print the profile as JSON."""
+    sys.path.insert(0, str(root))
+    os.environ.pop('KLOOM_DB', None)
+    os.environ['MIXCLOUD_API'] = 'http://127.0.0.1:9/'   # belt and braces: offline never fetches
+    import generate
+    if options.pop('skip_og'):
+        generate.render_og_images = lambda shows, *args, **kwargs: set()
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            generate.generate_site(offline=True, profile=True, **options)
+        finally:
+            sys.stdout = stdout
+    with open(generate.PROFILE_FILE, encoding='utf-8') as f:
+        report = json.load(f)
+    report.pop('shows')
+    print(json.dumps(report))
+
+def run_build(root, full, jobs, skip_og):
+    """One build in a fresh interpreter, so peak RSS belongs to that build alone."""
+    options = {'full': full, 'jobs': jobs, 'skip_og': skip_og}
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, __file__, '--worker', str(root), json.dumps(options)],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        print(f"ERROR: benchmark build failed in {root}")
+        sys.exit(1)
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    phases = {}
+    for entry in report['phases']:
+        name = entry['phase']
+        if name in REPORT_PHASES:
+            phase = phases.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'peak_mem_bytes': 0})
+            phase['wall_s'] = round(phase['wall_s'] + entry['wall_s'], 6)
+            phase['cpu_s'] = round(phase['cpu_s'] + entry['cpu_s'], 6)
+            phase['peak_mem_bytes'] = max(phase['peak_mem_bytes'], entry['peak_mem_bytes'])
+    return {
+        'wall_s': round(time.perf_counter() - started, 3),
+        'build_wall_s': report['total']['wall_s'],
+        'peak_traced_bytes': report['total']['peak_traced_bytes'],
+        'max_rss_kb': report['total']['max_rss_kb'],
+        'phases': phases,
+    }
+
+def bench_size(size, jobs=None, og_limit=OG_LIMIT):
+    skip_og = size > og_limit
+    with tempfile.TemporaryDirectory(prefix=f'kloom-bench-{size}-') as tmp:
+        root = Path(tmp)
+        started = time.perf_counter()
+        make_tree(root, synthetic_archive(size))
+        setup = time.perf_counter() - started
+        runs = {'full': run_build(root, True, jobs, skip_og),
+                'noop': run_build(root, False, jobs, skip_og)}
+        edit_one_show(root)
+        runs['edit_one'] = run_build(root, False, jobs, skip_og)
+    return {'shows': size, 'og_skipped': skip_og, 'setup_s': round(setup, 3), 'runs': runs}
+
+# ── reporting ──
+
+def _mb(n):
+    return f"{n / 1e6:.1f}MB" if n is not None else '-'
+
+def print_results(results):
+    for entry in results['sizes']:
+        note = ' (OG skipped)' if entry['og_skipped'] else ''
+        print(f"\n{entry['shows']} shows{note}")
+        for run, data in entry['runs'].items():
+            print(f"  {run:<9} {data['wall_s']:>9.2f}s  peak {_mb(data['peak_traced_bytes'])}"
+                  f"  rss {data['max_rss_kb'] / 1024:.0f}MB")
+            for name, phase in data['phases'].items():
+                print(f"    {name:<15} {phase['wall_s']:>9.3f}s  {_mb(phase['peak_mem_bytes']):>9}")
+
+def compare(results, baseline, threshold=THRESHOLD, min_wall=0.05):
+    """Return regression messages for phases worse than `baseline` by more than `threshold`."""
+    old_sizes = {entry['shows']: entry for entry in baseline.get('sizes', [])}
+    regressions = []
+    for entry in results['sizes']:
+        old = old_sizes.get(entry['shows'])
+        if not old:
+            continue
+        for run, data in entry['runs'].items():
+            old_run = old['runs'].get(run)
+            if not old_run:
+                continue
+            checks = [('total', 'wall_s', data['wall_s'], old_run['wall_s'])]
+            checks.append(('total', 'peak mem', data['peak_traced_bytes'], old_run['peak_traced_bytes']))
+            for name, phase in data['phases'].items():
+                old_phase = old_run['phases'].get(name)
+                if old_phase:
+                    checks.append((name, 'wall_s', phase['wall_s'], old_phase['wall_s']))
+                    checks.append((name, 'peak mem', phase['peak_mem_bytes'], old_phase['peak_mem_bytes']))
+            for name, metric, new, before in checks:
+                if not new or not before or (metric == 'wall_s' and new < min_wall):
+                    continue
+                if new > before * (1 + threshold):
+                    regressions.append(f"{entry['shows']} shows / {run} / {name}: {metric} "
+                                       f"{before:g} -> {new:g} (+{(new / before - 1) * 100:.0f}%)")
+    return regressions
+
+def main(argv):
+    def option(flag, default):
+        return argv[argv.index(flag) + 1] if flag in argv else default
+
+    sizes = [int(s) for s in option('--sizes', ','.join(map(str, DEFAULT_SIZES))).split(',')]
+    jobs = int(option('--jobs', 0)) or None
+    og_limit = int(option('--og-limit', OG_LIMIT))
+    threshold = float(option('--threshold', THRESHOLD))
+    results_file = Path(option('--output', RESULTS_FILE))
+    baseline_file = Path(option('--baseline', BASELINE_FILE))
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    results = {
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'sizes': [],
+    }
+    for size in sizes:
+        print(f"Benchmarking {size} shows...", flush=True)
+        results['sizes'].append(bench_size(size, jobs, og_limit))
+    print_results(results)
+
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f"\nResults: {os.path.relpath(results_file)}")
+
+    if '--save-baseline' in argv:
+        shutil.copyfile(results_file, baseline_file)
+        print(f"Baseline saved: {os.path.relpath(baseline_file)}")
+        return 0
+    if not baseline_file.exists():
+        print(f"No baseline at {os.path.relpath(baseline_file)} (run with --save-baseline to record one)")
+        return 0
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, threshold)
+    if regressions:
+        print(f"\nRegressions against {os.path.relpath(baseline_file)} "
+              f"(commit {baseline.get('commit') or '?'}, threshold {threshold:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {os.path.relpath(baseline_file)} (threshold {threshold:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        _worker(Path(sys.argv[2]), json.loads(sys.argv[3]))
+    else:
+        sys.exit(main(sys.argv[1:]))
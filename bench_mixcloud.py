@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+bench_mixcloud.py  ─  Mixcloud client check against a local stand-in API  ─  Kloom Lo Kadosh
+
+  Run:  python3 bench_mixcloud.py [--shows 40] [--workers 8]
+
+Starts a stand-in for api.mixcloud.com on a spare local port (http.server,
+HTTP/1.1 keep-alive) and points generate.py's MixcloudClient at it, the same
+way MIXCLOUD_API=http://127.0.0.1:PORT does for a real build.  Checked:
+
+  reuse       --shows cloudcasts fetched by --workers threads open at most
+              one connection per worker
+  304         a stale cache entry is revalidated with If-None-Match, the
+              server answers 304 and the cached body is returned
+  reset       a connection reset before the response is retried and succeeds
+  retry       a 503 is retried and the next answer used
+
+Nothing reaches the network and the metadata cache lives in a temp directory.
+Exit status is 1 if any check fails.
+"""
+
+import json
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import generate
+
+SHOWS   = 40
+WORKERS = 8
+
+class StandIn(ThreadingHTTPServer):
+    """Counts connections, requests and answers; fails chosen paths once."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = {}      # path -> request count
+        self.statuses = []
+        self.reset_once = set()
+        self.busy_once = set()
+
+    @property
+    def base(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def count(self, path, status=None):
+        with self.lock:
+            if status is None:
+                self.requests[path] = self.requests.get(path, 0) + 1
+            else:
+                self.statuses.append(status)
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server, path = self.server, self.path
+        server.count(path)
+        with server.lock:
+            reset, busy = path in server.reset_once, path in server.busy_once
+            server.reset_once.discard(path)
+            server.busy_once.discard(path)
+        if reset:   # RST instead of a response
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.close_connection = True
+            return
+        if busy:
+            return self._send(503, b'busy')
+        etag = '"' + path.strip('/').replace('/', '-') + '"'
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, b'', etag)
+        body = json.dumps({'name': path, 'play_count': 1, 'tags': [],
+                           'pictures': {'extra_large': f'http://127.0.0.1/{path}.jpg'}}).encode()
+        self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.server.count(self.path, status)
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def check_reuse(server, cache_dir, shows, workers):
+    paths = [f'/kloom/show-{i}/' for i in range(shows)]
+    before = server.connections
+    results = generate.fetch_all_metadata(paths, workers=workers, base=server.base,
+                                          cache=generate.MetadataCache(cache_dir))
+    opened = server.connections - before
+    ok = all(results.values()) and opened <= workers
+    return ok, f"{shows} requests over {opened} connection(s) (at most {workers})"
+
+def check_304(server, cache_dir):
+    path = '/kloom/revalidate/'
+    client = generate.MixcloudClient(base=server.base, cache=generate.MetadataCache(cache_dir, ttl=0))
+    try:
+        first = client.get_json(path)
+        second = client.get_json(path)
+    finally:
+        client.close()
+    ok = first is not None and first == second and server.statuses.count(304) == 1
+    return ok, f"{server.requests.get(path, 0)} requests, {server.statuses.count(304)} answered 304"
+
+def check_failure(server, path, fails):
+    fails.add(path)
+    client = generate.MixcloudClient(base=server.base, backoff=0.01)
+    try:
+        data = client.get_json(path)
+    finally:
+        client.close()
+    return data is not None and server.requests.get(path) == 2, f"{server.requests.get(path, 0)} attempts"
+
+def main(argv):
+    def option(flag, default, kind=str):
+        return kind(argv[argv.index(flag) + 1]) if flag in argv else default
+
+    shows, workers = option('--shows', SHOWS, int), option('--workers', WORKERS, int)
+    server = StandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Stand-in Mixcloud API at {server.base}", flush=True)
+    failed = 0
+    with tempfile.TemporaryDirectory() as cache_dir:
+        checks = [
+            ('reuse', lambda: check_reuse(server, cache_dir, shows, workers)),
+            ('304',   lambda: check_304(server, cache_dir)),
+            ('reset', lambda: check_failure(server, '/kloom/reset/', server.reset_once)),
+            ('retry', lambda: check_failure(server, '/kloom/busy/', server.busy_once)),
+        ]
+        results = []
+        for name, check in checks:
+            start = time.perf_counter()
+            ok, detail = check()
+            results.append((name, ok, detail, time.perf_counter() - start))
+    server.shutdown()
+    print()
+    for name, ok, detail, elapsed in results:
+        failed += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'}  {name:<6} {detail}  ({elapsed * 1000:.0f} ms)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
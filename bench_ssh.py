@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+bench_ssh.py  ─  load test for the SSH teletext server  ─  Kloom Lo Kadosh
+
+  Run:     python3 bench_ssh.py [--sessions 1000] [--procs 4] [--duration 30]
+  Remote:  python3 bench_ssh.py --target host:port   (no server stats)
+
+Starts kloom_ssh.py on a spare local port (with a throwaway host key), then
+opens --sessions simulated listeners against it through asyncssh's client,
+--rate new connections per second, spread over --procs client processes so
+the load generator itself is not the bottleneck.  Each listener follows a
+scripted key sequence with randomized think time for --duration seconds:
+
+  browse   scroll the archive, open shows, the URL popup, help and about
+  tune     open a show and tune in / out
+  idle     sit on the animated splash page
+
+Reported: SSH connect latency and time to first frame, keypress-to-frame
+latency percentiles (time from sending a key to receiving output that
+contains the expected page text), bytes received per session per second, and
+the server's CPU and resident memory sampled once a second.  Results go to
+.cache/ssh-bench-results.json.
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+import asyncssh
+
+BASE_DIR     = Path(__file__).resolve().parent
+RESULTS_FILE = BASE_DIR / '.cache' / 'ssh-bench-results.json'
+
+SESSIONS  = 100
+PROCS     = 1
+RATE      = 50.0     # new connections per second, across all client processes
+DURATION  = 30.0     # seconds each listener stays connected
+THINK     = 1.0      # mean pause between keys; each pause is 0.5x-1.5x this
+KEY_TIMEOUT = 10.0   # a key with no matching output by then counts as a timeout
+SAMPLE_INTERVAL = 1.0
+
+UP, DOWN, ENTER, ESC = b'\x1b[A', b'\x1b[B', b'\r', b'\x1b'
+
+# (key, text the response must contain) -- None accepts any output.  Pages:
+# archive "shows]", detail " INFO ", URL popup "LISTEN URL", help "NAVIGATION",
+# about "All frequencies", splash "MENU".  Scripts loop until the duration is up.
+# Only changed lines are sent, so a 't' whose effect another listener undid in
+# the meantime (tune state is shared) can rightly time out.
+SCRIPTS = {
+    'browse': [
+        (b'1', b'shows]'), *[(DOWN, None)] * 5, *[(UP, None)] * 2,
+        (ENTER, b' INFO '), (b'o', b'LISTEN URL'), (b'o', b' INFO '), (ESC, b'shows]'),
+        *[(DOWN, None)] * 3, (ENTER, b' INFO '), (ESC, b'shows]'), (ESC, b'MENU'),
+        (b'3', b'NAVIGATION'), (ESC, b'MENU'), (b'2', b'All frequencies'), (ESC, b'MENU'),
+    ],
+    'tune': [
+        (b'1', b'shows]'), (DOWN, None), (ENTER, b' INFO '), (b't', b'TUNE'), (b't', b'TUNE'),
+        (ESC, b'shows]'), (DOWN, None), (ENTER, b' INFO '), (b't', b'TUNE'), (ESC, b'shows]'),
+        (ESC, b'MENU'),
+    ],
+    'idle': [],
+}
+MIX = ('browse', 'browse', 'tune', 'idle')   # scripts handed out round-robin
+
+def percentiles(values, points=(50, 90, 95, 99)):
+    """Nearest-rank percentiles of `values` (None when empty), plus max."""
+    if not values:
+        return {f'p{p}': None for p in points} | {'max': None}
+    ordered = sorted(values)
+    result = {f'p{p}': round(ordered[max(0, -(-p * len(ordered) // 100) - 1)], 6) for p in points}
+    result['max'] = round(ordered[-1], 6)
+    return result
+
+# ── simulated listener ──
+
+class Listener:
+    """One SSH session: reads every byte, matches responses to sent keys."""
+
+    def __init__(self, index, script):
+        self.index    = index
+        self.script   = script
+        self.received = 0
+        self.latency  = []     # keypress-to-frame, seconds
+        self.timeouts = 0
+        self.connect  = None   # SSH handshake done
+        self.first    = None   # first frame received
+        self.error    = None
+        self._buf     = bytearray()
+        self._expect  = None   # (marker, future) while waiting on a key
+
+    def _feed(self, data):
+        self.received += len(data)
+        if self._expect is None:
+            return
+        marker, future = self._expect
+        if marker is None:
+            hit = True
+        else:
+            self._buf += data
+            hit = marker in self._buf
+            del self._buf[:-len(marker)]
+        if hit and not future.done():
+            future.set_result(time.perf_counter())
+
+    async def _read(self, stdout):
+        started = time.perf_counter()
+        while True:
+            data = await stdout.read(65536)
+            if not data:
+                return
+            if self.first is None:
+                self.first = time.perf_counter() - started
+            self._feed(data)
+
+    async def _press(self, stdin, key, marker):
+        future = asyncio.get_running_loop().create_future()
+        self._buf.clear()
+        self._expect = (marker, future)
+        sent = time.perf_counter()
+        stdin.write(key)
+        try:
+            self.latency.append(await asyncio.wait_for(future, KEY_TIMEOUT) - sent)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+        finally:
+            self._expect = None
+
+    async def run(self, host, port, duration, think):
+        started = time.perf_counter()
+        try:
+            async with asyncssh.connect(host, port, username='listener', known_hosts=None,
+                                        client_keys=None, config=None) as conn:
+                self.connect = time.perf_counter() - started
+                proc = await conn.create_process(term_type='xterm-256color', term_size=(80, 24),
+                                                 encoding=None)
+                reader = asyncio.create_task(self._read(proc.stdout))
+                deadline = time.perf_counter() + duration
+                await asyncio.sleep(think * random.uniform(0.5, 1.5))
+                proc.stdin.write(b' ')   # skip the intro (not measured)
+                step = 0
+                while time.perf_counter() < deadline:
+                    await asyncio.sleep(think * random.uniform(0.5, 1.5))
+                    if self.script and time.perf_counter() < deadline:
+                        key, marker = self.script[step % len(self.script)]
+                        await self._press(proc.stdin, key, marker)
+                        step += 1
+                self.elapsed = time.perf_counter() - started - self.connect
+                proc.stdin.write(b'q')
+                try:
+                    await asyncio.wait_for(reader, 5)
+                except asyncio.TimeoutError:
+                    reader.cancel()
+        except (OSError, asyncssh.Error) as e:
+            self.error = f'{type(e).__name__}: {e}'
+
+    def result(self):
+        return {
+            'index': self.index, 'error': self.error, 'connect_s': self.connect,
+            'first_frame_s': self.first, 'bytes': self.received, 'timeouts': self.timeouts,
+            'latency_s': [round(v, 6) for v in self.latency],
+            'bytes_per_s': round(self.received / self.elapsed, 1) if getattr(self, 'elapsed', 0) else None,
+        }
+
+async def _run_listeners(options):
+    """Client-process body: start this process's share of listeners on schedule."""
+    listeners = []
+    tasks = []
+    started = time.perf_counter()
+    for index in options['indexes']:
+        await asyncio.sleep(max(0.0, started + index / options['rate'] - time.perf_counter()))
+        listener = Listener(index, SCRIPTS[MIX[index % len(MIX)]])
+        listeners.append(listener)
+        tasks.append(asyncio.create_task(
+            listener.run(options['host'], options['port'], options['duration'], options['think'])))
+    await asyncio.gather(*tasks)
+    return [listener.result() for listener in listeners]
+
+# ── server ──
+
+def _serve(port, host_key):
+    """Run kloom_ssh.py's server on `port` with a throwaway host key."""
+    sys.argv = [sys.argv[0]]
+    sys.path.insert(0, str(BASE_DIR))
+    import kloom_ssh
+    kloom_ssh.PORT = port
+    kloom_ssh.HOST_KEY = Path(host_key)
+    sys.stdout = open(os.devnull, 'w')
+    asyncio.run(kloom_ssh.main())
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _proc_stats(pid):
+    """(cpu seconds, rss bytes) of a local process from /proc, or None off Linux."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm') as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    return (int(fields[11]) + int(fields[12])) / ticks, rss_pages * os.sysconf('SC_PAGE_SIZE')
+
+async def _wait_for_port(host, port, timeout=15.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+async def _sample(pid, samples, stop):
+    last = _proc_stats(pid)
+    last_t = time.perf_counter()
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        now, now_t = _proc_stats(pid), time.perf_counter()
+        if now is None or last is None:
+            return
+        samples.append({'t': round(now_t, 3), 'cpu_pct': round((now[0] - last[0]) / (now_t - last_t) * 100, 1),
+                        'rss_bytes': now[1]})
+        last, last_t = now, now_t
+
+# ── driver ──
+
+def _raise_fd_limit():
+    """Lift the soft open-file limit (inherited by the server and clients)."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def summarize(results, samples, wall):
+    ok = [r for r in results if not r['error']]
+    summary = {
+        'sessions': len(results),
+        'connected': len(ok),
+        'errors': len(results) - len(ok),
+        'wall_s': round(wall, 3),
+        'connect_s': percentiles([r['connect_s'] for r in ok]),
+        'first_frame_s': percentiles([r['first_frame_s'] for r in ok if r['first_frame_s'] is not None]),
+        'key_latency_s': percentiles([v for r in ok for v in r['latency_s']]),
+        'keys': sum(len(r['latency_s']) + r['timeouts'] for r in ok),
+        'key_timeouts': sum(r['timeouts'] for r in ok),
+        'bytes_per_session_s': percentiles([r['bytes_per_s'] for r in ok if r['bytes_per_s'] is not None]),
+        'bytes_total': sum(r['bytes'] for r in results),
+    }
+    if samples:
+        cpu = [s['cpu_pct'] for s in samples]
+        summary['server'] = {'cpu_pct_mean': round(sum(cpu) / len(cpu), 1), 'cpu_pct_max': max(cpu),
+                             'rss_max_bytes': max(s['rss_bytes'] for s in samples)}
+    errors = {}
+    for r in results:
+        if r['error']:
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+    summary['error_kinds'] = errors
+    return summary
+
+def _ms(value):
+    return f"{value * 1000:.1f}ms" if value is not None else '-'
+
+def print_summary(s):
+    print(f"\nSessions: {s['connected']}/{s['sessions']} connected, {s['errors']} errors, {s['wall_s']:.1f}s")
+    for label, key in (('connect', 'connect_s'), ('first frame', 'first_frame_s'), ('key→frame', 'key_latency_s')):
+        p = s[key]
+        print(f"  {label:<12} p50 {_ms(p['p50'])}  p90 {_ms(p['p90'])}  p95 {_ms(p['p95'])}"
+              f"  p99 {_ms(p['p99'])}  max {_ms(p['max'])}")
+    print(f"  keys         {s['keys']} sent, {s['key_timeouts']} timed out")
+    b = s['bytes_per_session_s']
+    if b['p50'] is not None:
+        print(f"  bytes/s      p50 {b['p50']:.0f}  p90 {b['p90']:.0f}  p99 {b['p99']:.0f}  max {b['max']:.0f}"
+              f"  (total {s['bytes_total'] / 1e6:.1f}MB)")
+    if 'server' in s:
+        srv = s['server']
+        print(f"  server       cpu mean {srv['cpu_pct_mean']}%  max {srv['cpu_pct_max']}%"
+              f"  rss max {srv['rss_max_bytes'] / 1e6:.1f}MB")
+    for error, count in s['error_kinds'].items():
+        print(f"  {count} × {error}")
+
+async def bench(options):
+    procs = max(1, min(options['procs'], options['sessions']))
+    server = None
+    samples = []
+    with tempfile.TemporaryDirectory(prefix='kloom-ssh-bench-') as tmp:
+        if options['target']:
+            host, port = options['target'].rsplit(':', 1)
+            port = int(port)
+        else:
+            host, port = '127.0.0.1', _free_port()
+            server = subprocess.Popen([sys.executable, __file__, '--serve', str(port), str(Path(tmp) / 'host_key')])
+        try:
+            await _wait_for_port(host, port)
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(_sample(server.pid, samples, stop)) if server else None
+            started = time.perf_counter()
+            workers = []
+            for w in range(procs):
+                worker_options = dict(host=host, port=port, rate=options['rate'], duration=options['duration'],
+                                      think=options['think'], indexes=list(range(w, options['sessions'], procs)))
+                workers.append(await asyncio.create_subprocess_exec(
+                    sys.executable, __file__, '--worker', json.dumps(worker_options),
+                    stdout=asyncio.subprocess.PIPE))
+            results = []
+            for worker in workers:
+                out, _ = await worker.communicate()
+                if worker.returncode != 0:
+                    print(f"ERROR: client process exited with status {worker.returncode}")
+                    sys.exit(1)
+                results.extend(json.loads(out))
+            wall = time.perf_counter() - started
+            stop.set()
+            if sampler:
+                await sampler
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+    return summarize(sorted(results, key=lambda r: r['index']), samples, wall), results, samples
+
+def main(argv):
+    def option(flag, default, kind=str):
+        return kind(argv[argv.index(flag) + 1]) if flag in argv else default
+
+    options = dict(sessions=option('--sessions', SESSIONS, int), procs=option('--procs', PROCS, int),
+                   rate=option('--rate', RATE, float), duration=option('--duration', DURATION, float),
+                   think=option('--think', THINK, float), target=option('--target', None))
+    output = Path(option('--output', RESULTS_FILE))
+    _raise_fd_limit()
+    print(f"{options['sessions']} listeners, {options['rate']:g}/s over {options['procs']} client process(es), "
+          f"{options['duration']:g}s each", flush=True)
+    summary, results, samples = asyncio.run(bench(options))
+    print_summary(summary)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                   'options': options, 'summary': summary, 'server_samples': samples,
+                   'sessions': results}, f, indent=1)
+    print(f"\nResults: {os.path.relpath(output)}")
+    return 1 if summary['errors'] else 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        _serve(int(sys.argv[2]), sys.argv[3])
+    elif len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        print(json.dumps(asyncio.run(_run_listeners(json.loads(sys.argv[2])))))
+    else:
+        sys.exit(main(sys.argv[1:]))
@@ -2,10 +2,44 @@ import json
 import os
 import sys
 import datetime
+import filecmp
+import gzip
+import hashlib
+import importlib.util
+import re
+import shutil
+import struct
+import unicodedata
+import urllib.error
 import urllib.request
+import http.client
+import subprocess
+import threading
+import time
+import tracemalloc
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from itertools import accumulate
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
-from urllib.parse import urlparse, parse_qs, unquote
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+try:
+    import numpy as np
+except ImportError:  # optional: waveform peaks fall back to plain Python
+    np = None
+try:
+    import brotli
+except ImportError:  # optional: only .gz siblings without it
+    brotli = None
+from jinja2 import Environment, FileSystemLoader, nodes
+from urllib.parse import urlparse, quote
+from kloom_store import SITE_URL, Show, ShowList, ShowStore, load_shows, store_path
 
 # Config - Use relative paths
 BASE_DIR = Path(__file__).resolve().parent
@@ -13,19 +47,109 @@ DATA_FILE = BASE_DIR / 'data' / 'shows.json'
 TEMPLATE_DIR = BASE_DIR / 'templates'
 OUTPUT_DIR = BASE_DIR
 SHOWS_DIR = OUTPUT_DIR / 'shows'
-BASE_URL  = 'https://willbearfruits.github.io/kloom-radio'
+BASE_URL  = SITE_URL   # defined in kloom_store, shared with kloom_ssh.py
+CACHE_DIR = BASE_DIR / '.cache'
+MANIFEST_FILE = CACHE_DIR / 'build-manifest.json'
+PROFILE_FILE  = CACHE_DIR / 'build-profile.json'
+PAGE_CHANGES_FILE = CACHE_DIR / 'page-changes.json'
+SEARCH_DIR    = OUTPUT_DIR / 'search'
+
+# Search index shards: split a shard on a longer term prefix above this size
+SEARCH_SHARD_BYTES = 16 * 1024
+SEARCH_MAX_TOKEN   = 24    # longer words are indexed by their first N characters
+SEARCH_VERSION     = 3     # search/manifest.json format
+SEARCH_CACHE_FILE  = CACHE_DIR / 'search-index.json'
+SEARCH_LEGACY_FILE = OUTPUT_DIR / 'search-index.json'   # pre-search/ index, removed once search/ is built
+
+# Listing pages: index.html shows the newest HOME_LATEST shows; archive.html,
+# archive-2.html, ... and series-<slug>.html pages hold ARCHIVE_PAGE_SIZE each.
+ARCHIVE_PAGE_SIZE = 50
+HOME_LATEST       = 8
+
+# RSS: items per feed (feed.xml and feeds/<series>.xml), and the show fields
+# an item is built from (other edits leave the feeds untouched)
+FEED_ITEM_LIMIT = 50
+FEED_FIELDS     = ('id', 'title', 'description', 'series', 'date')
+
+# Sitemap protocol limits per file; larger sites get a sitemap index
+SITEMAP_MAX_URLS  = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+# Build timestamp footer, ignored when deciding whether a page changed
+GENERATED_STAMP = re.compile(rb'GENERATED:? \d{4}-\d\d-\d\d \d\d:\d\d:\d\d')
+
+# Local cover art: Mixcloud images are downloaded once and resized
+COVER_WIDTHS    = (150, 300, 600)   # list thumbnail, its 2x, mobile full width
+COVER_QUALITY   = {'jpeg': 82, 'webp': 80}
+COVER_SIZES     = '(max-width: 600px) 100vw, 150px'
+COVER_CACHE_DIR = CACHE_DIR / 'covers'
+COVER_SIGNATURES = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n', b'GIF87a', b'GIF89a')   # + RIFF....WEBP
+
+# Waveform peak sidecars for local audio (decoded with ffmpeg)
+WAVEFORM_RESOLUTIONS = (256, 1024, 4096)   # (min, max) buckets per sidecar file
+WAVEFORM_RATE        = 8000                # Hz, mono, when decoding for peaks
+WAVEFORM_BLOCK       = 128                 # samples per first-pass peak block
+WAVEFORM_CACHE_DIR   = CACHE_DIR / 'waveforms'
+
+# Pre-compression (--compress): which outputs get .gz / .br siblings
+COMPRESS_SUFFIXES = ('.html', '.xml', '.json', '.js', '.css')
+COMPRESS_STATIC   = ['404.html', 'assets/player.js', 'assets/player.css']
+COMPRESSORS       = [('.gz', partial(gzip.compress, compresslevel=9, mtime=0))]
+if brotli:
+    COMPRESSORS.append(('.br', partial(brotli.compress, quality=11)))
+COMPRESSED_SUFFIXES = ('.gz', '.br')   # every sibling kind, even without brotli here
+
+# Podcast feeds (--podcast): enclosure types and the probe cache for local audio
+AUDIO_TYPES      = {'.m4a': 'audio/mp4', '.mp4': 'audio/mp4', '.mp3': 'audio/mpeg'}
+AUDIO_PROBE_FILE = CACHE_DIR / 'audio-probe.json'
+
+# Series listing pages (slug, heading, series names); the same groupings as the
+# archive sections in kloom_ssh.py, plus the guest series
+SERIES_PAGES = [
+    ('kloom-originals',  'KLOOM ORIGINALS & GUESTS',           ('Kloom Lo Kadosh', 'Radio Art 106')),
+    ('you-are-not-holy', 'YOU ARE NOT HOLY גם אתה לא קדוש',    ('You Are Not Holy',)),
+    ('nothing-is-holy',  'ARCHIVE: NOTHING IS HOLY',           ('Nothing Is Holy',)),
+    ('kol-hazuti',       'ARCHIVE: VISUAL VOICE (KOL HAZUTI)', ('Kol Hazuti',)),
+]
+
+# Mixcloud API (override MIXCLOUD_API to point builds at a local stand-in server)
+MIXCLOUD_API   = os.environ.get('MIXCLOUD_API', 'https://api.mixcloud.com').rstrip('/')
+FETCH_WORKERS  = 8     # concurrent metadata requests
+FETCH_TIMEOUT  = 10    # seconds per request
+FETCH_RETRIES  = 3     # retries per request on network errors / 429 / 5xx
+FETCH_DEADLINE = 60    # seconds for the whole metadata stage
+MIXCLOUD_CACHE_DIR = CACHE_DIR / 'mixcloud'
+MIXCLOUD_CACHE_TTL = 6 * 3600   # seconds before a cached response is revalidated
+
+# --watch polling
+WATCH_INTERVAL = 0.5   # seconds between file stat scans
+WATCH_DEBOUNCE = 0.3   # quiet period required before rebuilding
+
+# Bump whenever a change to this script alters generated output, so the next
+# incremental build re-renders everything instead of trusting the manifest.
+GENERATOR_VERSION = 8
 
 def load_data():
-    """Load show data from JSON file with error handling."""
+    """Load and validate show data from JSON file (or the $KLOOM_DB store) with error handling."""
+    db = store_path()
     try:
+        if db:
+            if not db.exists():
+                print(f"ERROR: Show database not found at {db} (create it with: python3 kloom_store.py import)")
+                sys.exit(1)
+            with ShowStore(db, readonly=True) as store:
+                return store.all()
         with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            return load_shows(json.load(f))
     except FileNotFoundError:
         print(f"ERROR: Data file not found at {DATA_FILE}")
         sys.exit(1)
     except json.JSONDecodeError as e:
         print(f"ERROR: Invalid JSON in data file: {e}")
         sys.exit(1)
+    except ValueError as e:
+        print(f"ERROR: Invalid show data: {e}")
+        sys.exit(1)
     except Exception as e:
         print(f"ERROR: Could not load data: {e}")
         sys.exit(1)
@@ -34,129 +158,655 @@ def save_data(data):
     """Save show data to JSON file with error handling."""
     try:
         with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+            json.dump([show.as_dict() for show in data], f, indent=4, ensure_ascii=False)
     except IOError as e:
         print(f"ERROR: Could not save data: {e}")
         sys.exit(1)
 
-def extract_feed_path(embed_url):
-    parsed = urlparse(embed_url)
-    query = parse_qs(parsed.query)
-    if 'feed' in query:
-        return unquote(query['feed'][0])
-    return None
+def _json_default(obj):
+    """Shows serialise as their record plus the URLs the web player needs."""
+    return obj.as_dict(derived=True) if isinstance(obj, Show) else str(obj)
+
+def digest(*parts):
+    """Stable short hash of JSON-serialisable build inputs."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=_json_default).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()[:16]
+
+class BuildProfiler:
+    """Opt-in per-phase / per-show build instrumentation.
+
+    ``with profiler.phase('name'):`` records wall time, CPU time, bytes
+    written through write_output() and peak traced Python memory for the
+    block; passing ``show=<id>`` records a per-show step instead.  When
+    disabled every call is a cheap no-op.
+    """
+
+    def __init__(self):
+        self.reset(False)
 
-def fetch_mixcloud_metadata(feed_path):
-    if not feed_path.endswith('/'):
-        feed_path += '/'
-    api_url = f"https://api.mixcloud.com{feed_path}"
-    print(f"Fetching metadata from: {api_url}")
+    def reset(self, enabled):
+        self.enabled = enabled
+        self.phases  = []
+        self.steps   = []
+        self._stack  = []
+        self._start  = (time.perf_counter(), time.process_time())
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name, show=None):
+        if not self.enabled:
+            yield
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        frame = {'bytes': 0, 'peak': 0, 'mem0': current}
+        self._stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self._stack.pop()
+            frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+            self.record(name, wall, cpu, frame['bytes'], frame['peak'] - frame['mem0'], show)
+
+    def record(self, name, wall, cpu, nbytes=0, peak=0, show=None):
+        """Add a measurement taken elsewhere (e.g. in an OG worker process)."""
+        if not self.enabled:
+            return
+        entry = {'phase': name, 'wall_s': round(wall, 6), 'cpu_s': round(cpu, 6),
+                 'bytes_written': nbytes, 'peak_mem_bytes': max(0, peak)}
+        if show is None:
+            self.phases.append(entry)
+        else:
+            entry['show'] = show
+            self.steps.append(entry)
+
+    def add_bytes(self, n):
+        for frame in self._stack:
+            frame['bytes'] += n
+
+    def report(self, path=PROFILE_FILE):
+        """Write the JSON report to `path` and print a human summary."""
+        if not self.enabled:
+            return
+        wall = time.perf_counter() - self._start[0]
+        cpu  = time.process_time() - self._start[1]
+        children = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                                    text=True, timeout=5).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        data = {
+            'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': sys.version.split()[0],
+            'total': {
+                'wall_s': round(wall, 6),
+                'cpu_s': round(cpu, 6),
+                'child_cpu_s': round(children.ru_utime + children.ru_stime, 6) if children else None,
+                'bytes_written': sum(p['bytes_written'] for p in self.phases),
+                'peak_traced_bytes': tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None,
+                'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+            },
+            'phases': self.phases,
+            'shows': self.steps,
+        }
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1)
+        except OSError as e:
+            print(f"WARNING: Could not write build profile: {e}")
+
+        print(f"\n── build profile ({wall:.3f}s wall, {cpu:.3f}s CPU) → {path}")
+        print(f"  {'phase':<20}{'wall':>9}{'cpu':>9}{'written':>11}{'peak mem':>11}")
+        for p in sorted(self.phases, key=lambda p: p['wall_s'], reverse=True):
+            print(f"  {p['phase']:<20}{p['wall_s']:>8.3f}s{p['cpu_s']:>8.3f}s"
+                  f"{p['bytes_written'] / 1024:>9.1f}KB{p['peak_mem_bytes'] / 1024:>9.1f}KB")
+        totals = {}
+        for step in self.steps:
+            totals[step['show']] = totals.get(step['show'], 0) + step['wall_s']
+        if totals:
+            print("  slowest shows:")
+            for show_id, secs in sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:5]:
+                print(f"    {secs * 1000:8.1f} ms  {show_id}")
+
+profiler = BuildProfiler()
+
+def write_output(path, text):
+    """Write a generated text file (UTF-8), counting bytes for the profiler.
+
+    A file whose content would not change is left alone (keeping its mtime);
+    returns True if the file was written.
+    """
+    data = text.encode('utf-8')
     try:
-        with urllib.request.urlopen(api_url) as response:
-            if response.status == 200:
-                return json.loads(response.read().decode())
-    except Exception as e:
-        print(f"Error fetching {api_url}: {e}")
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    drop_compressed(path)
+    profiler.add_bytes(len(data))
+    return True
+
+def drop_compressed(path, mtime_ns=None):
+    """Remove the .gz / .br siblings of `path`, which no longer match its content.
+
+    With `mtime_ns`, siblings carrying that mtime (compressed from the current
+    source, see compress_file) are kept.
+    """
+    path = Path(path)
+    for suffix in COMPRESSED_SUFFIXES:
+        sibling = path.with_name(path.name + suffix)
+        try:
+            if mtime_ns is None or sibling.stat().st_mtime_ns != mtime_ns:
+                sibling.unlink()
+        except FileNotFoundError:
+            pass
+
+class TemplateGraph:
+    """Include / extends / import dependencies between templates.
+
+    Edges are read from each template's Jinja AST, so an output keyed on
+    digest('page.html') changes only when page.html or something it pulls
+    in (transitively) changes.  A template reference that is not a constant
+    name makes the template depend on every template.
+    """
+
+    DEP_NODES = (nodes.Include, nodes.Extends, nodes.Import, nodes.FromImport)
+
+    def __init__(self, env):
+        self.env      = env
+        self._sources = {}
+        self._deps    = {}
+        self._digests = {}
+
+    def source(self, name):
+        if name not in self._sources:
+            self._sources[name] = self.env.loader.get_source(self.env, name)[0]
+        return self._sources[name]
+
+    def direct(self, name):
+        """Templates referenced directly by `name`."""
+        if name not in self._deps:
+            deps = set()
+            for node in self.env.parse(self.source(name)).find_all(self.DEP_NODES):
+                ref = node.template
+                refs = ref.items if isinstance(ref, (nodes.List, nodes.Tuple)) else [ref]
+                for item in refs:
+                    if isinstance(item, nodes.Const) and isinstance(item.value, str):
+                        deps.add(item.value)
+                    else:
+                        deps.update(self.env.list_templates())
+            deps.discard(name)
+            self._deps[name] = deps
+        return self._deps[name]
+
+    def closure(self, name):
+        """`name` plus everything it depends on, transitively."""
+        seen, stack = set(), [name]
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self.direct(current) - seen)
+        return seen
+
+    def digest(self, name):
+        """Hash of the sources of `name` and all of its dependencies."""
+        if name not in self._digests:
+            self._digests[name] = digest({n: hashlib.sha256(self.source(n).encode('utf-8')).hexdigest()
+                                          for n in sorted(self.closure(name))})
+        return self._digests[name]
+
+class BuildManifest:
+    """Persistent record of the input hash each output was last built from.
+
+    An output is skipped when it still exists on disk and its recorded key
+    matches the key computed for this run.  An output may own a group of
+    companion files (e.g. search index shards) that are kept or rebuilt with
+    it.  Files recorded by a previous build but not produced by this one
+    (e.g. a deleted show) are removed.
+    """
+
+    def __init__(self, path=MANIFEST_FILE, full=False):
+        self.path     = Path(path)
+        self.outputs  = {}
+        self.groups   = {}
+        self.previous = set()
+        self.seen     = set()
+        self.built    = []
+        self.skipped  = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            groups = data.get('groups', {})
+            self.previous = set(data.get('outputs', {})).union(*groups.values())
+            if not full and data.get('generator') == GENERATOR_VERSION:
+                self.outputs = data.get('outputs', {})
+                self.groups  = groups
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def fresh(self, rel, key):
+        """True if `rel` is up to date for `key` (and counts it as skipped)."""
+        group = self.groups.get(rel, [])
+        self.seen.add(rel)
+        self.seen.update(group)
+        if self.outputs.get(rel) == key and all((OUTPUT_DIR / r).exists() for r in [rel, *group]):
+            self.skipped.append(rel)
+            return True
+        return False
+
+    def record(self, rel, key, group=()):
+        """Mark `rel` (and its companion files `group`) as freshly built from `key`."""
+        self.seen.difference_update(set(self.groups.get(rel, [])) - set(group))
+        self.seen.add(rel)
+        self.seen.update(group)
+        self.outputs[rel] = key
+        if group:
+            self.groups[rel] = sorted(group)
+        else:
+            self.groups.pop(rel, None)
+        self.built.append(rel)
+
+    def invalidate(self, rel):
+        """Keep `rel` on disk but force a rebuild next run (e.g. after an error)."""
+        self.seen.add(rel)
+        self.seen.update(self.groups.get(rel, []))
+        self.outputs.pop(rel, None)
+
+    def prune(self):
+        """Delete outputs from the previous build that this build no longer produces.
+
+        Their pre-compressed siblings, if any, go with them.
+        """
+        for rel in sorted(self.previous - self.seen):
+            self.outputs.pop(rel, None)
+            self.groups.pop(rel, None)
+            try:
+                (OUTPUT_DIR / rel).unlink()
+                print(f"Removed stale: {rel}")
+            except FileNotFoundError:
+                pass
+            drop_compressed(OUTPUT_DIR / rel)
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'generator': GENERATOR_VERSION, 'outputs': self.outputs, 'groups': self.groups},
+                          f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"WARNING: Could not save build manifest: {e}")
+
+    def report(self):
+        """Print what was rebuilt and what was skipped, grouped by output kind."""
+        def summarize(rels):
+            pages = sum(1 for r in rels if r.startswith('shows/'))
+            ogs   = sum(1 for r in rels if r.startswith('assets/og/'))
+            waves = sum(1 for r in rels if r.startswith('assets/waveforms/'))
+            covers = sum(1 for r in rels if r.startswith('assets/covers/'))
+            other = sorted(r for r in rels
+                           if not r.startswith(('shows/', 'assets/og/', 'assets/waveforms/', 'assets/covers/')))
+            parts = ([f"{pages} show pages"] if pages else []) + ([f"{ogs} OG images"] if ogs else []) \
+                + ([f"{waves} waveforms"] if waves else []) + ([f"{covers} covers"] if covers else []) + other
+            return ', '.join(parts) or 'nothing'
+        print(f"Built:   {summarize(self.built)}")
+        print(f"Skipped: {summarize(self.skipped)} (unchanged)")
+
+class MetadataCache:
+    """On-disk cache of Mixcloud API responses, one JSON file per feed path.
+
+    Each entry stores the decoded body, the ETag / Last-Modified validators and
+    the time it was last fetched or revalidated.  Entries younger than ``ttl``
+    seconds are served without touching the network.
+    """
+
+    def __init__(self, directory=MIXCLOUD_CACHE_DIR, ttl=MIXCLOUD_CACHE_TTL):
+        self.dir = Path(directory)
+        self.ttl = ttl
+
+    def _file(self, feed_path):
+        return self.dir / (hashlib.sha1(feed_path.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, feed_path):
+        try:
+            with open(self._file(feed_path), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('path') == feed_path else None
+
+    def fresh(self, entry):
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def put(self, feed_path, body, etag=None, last_modified=None):
+        entry = {'path': feed_path, 'fetched_at': time.time(), 'etag': etag,
+                 'last_modified': last_modified, 'body': body}
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            target = self._file(feed_path)
+            tmp = target.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, target)
+        except OSError as e:
+            print(f"WARNING: Could not cache {feed_path}: {e}")
+        return entry
+
+class MixcloudClient:
+    """Keep-alive JSON client for the Mixcloud API, shared by fetch threads.
+
+    Each thread reuses its own persistent HTTP(S) connection.  Every request
+    has a socket timeout, transient failures (network errors, 429, 5xx) are
+    retried with exponential backoff, and nothing is attempted once the
+    optional global ``deadline`` (seconds from creation) has passed.
+
+    With a ``cache`` (MetadataCache), fresh entries are served locally, stale
+    ones are revalidated with If-None-Match / If-Modified-Since, and a cached
+    copy is used when the API is unreachable.  ``offline`` never touches the
+    network and answers from the cache only.
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    REDIRECT_STATUS = {301, 302, 303, 307, 308}
+
+    def __init__(self, base=MIXCLOUD_API, timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES,
+                 backoff=0.5, deadline=None, cache=None, offline=False):
+        parsed = urlparse(base)
+        self.base     = base
+        self.conn_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        self.host     = parsed.hostname
+        self.port     = parsed.port
+        self.prefix   = parsed.path.rstrip('/')
+        self.timeout  = timeout
+        self.retries  = retries
+        self.backoff  = backoff
+        self.deadline = time.monotonic() + deadline if deadline else None
+        self.cache    = cache
+        self.offline  = offline
+        self._local   = threading.local()
+        self._conns   = []
+        self._lock    = threading.Lock()
+
+    def _remaining(self):
+        if self.deadline is None:
+            return self.timeout
+        return min(self.timeout, self.deadline - time.monotonic())
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.conn_class(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+
+    def get_json(self, feed_path):
+        """GET ``feed_path`` and return the decoded JSON, or None on failure."""
+        if not feed_path.endswith('/'):
+            feed_path += '/'
+        path = self.prefix + quote(feed_path)
+        entry = self.cache.get(feed_path) if self.cache else None
+        if entry and (self.offline or self.cache.fresh(entry)):
+            return entry['body']
+        if self.offline:
+            return None
+
+        headers = {'Accept': 'application/json', 'User-Agent': 'kloom-radio-generator'}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        print(f"{'Revalidating' if entry else 'Fetching'} metadata from: {self.base}{feed_path}")
+        error = None
+        for attempt in range(self.retries + 1):
+            remaining = self._remaining()
+            if remaining <= 0:
+                error = error or 'global deadline exceeded'
+                break
+            conn = self._conn()
+            conn.timeout = remaining
+            if conn.sock is not None:
+                conn.sock.settimeout(remaining)
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._drop()
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status == 304 and entry:
+                    # not modified: keep the body, restart the TTL clock
+                    self.cache.put(feed_path, entry['body'], entry.get('etag'), entry.get('last_modified'))
+                    return entry['body']
+                if response.status == 200:
+                    try:
+                        data = json.loads(body.decode())
+                    except ValueError as e:
+                        return self._fail(path, f"invalid JSON: {e}", entry)
+                    if self.cache:
+                        self.cache.put(feed_path, data, response.getheader('ETag'),
+                                       response.getheader('Last-Modified'))
+                    return data
+                location = response.getheader('Location')
+                if response.status in self.REDIRECT_STATUS and location:
+                    target = urlparse(location)
+                    if target.hostname not in (None, self.host):
+                        return self._fail(path, f"redirected off-host to {location}", entry)
+                    path = target.path
+                    continue
+                if response.status not in self.RETRY_STATUS:
+                    return self._fail(path, f"HTTP {response.status}", entry)
+                error = f"HTTP {response.status}"
+            if attempt < self.retries:
+                time.sleep(max(0, min(self.backoff * 2 ** attempt, self._remaining())))
+        return self._fail(path, error, entry)
+
+    def _fail(self, path, reason, entry=None):
+        if entry:
+            print(f"Error fetching {self.host}{path}: {reason} (using cached copy)")
+            return entry['body']
+        print(f"Error fetching {self.host}{path}: {reason}")
         return None
 
-def update_show_data(shows):
-    updated = False
+    def close(self):
+        with self._lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+
+def fetch_mixcloud_metadata(feed_path, client=None):
+    """Fetch one Mixcloud cloudcast's metadata (None on failure)."""
+    own_client = client is None
+    client = client or MixcloudClient()
+    try:
+        return client.get_json(feed_path)
+    finally:
+        if own_client:
+            client.close()
+
+def fetch_all_metadata(feed_paths, workers=FETCH_WORKERS, deadline=FETCH_DEADLINE, base=MIXCLOUD_API,
+                       cache=None, offline=False):
+    """Fetch many feed paths concurrently; returns {feed_path: metadata or None}.
+
+    At most ``workers`` requests are in flight, each worker thread keeps one
+    keep-alive connection, and the whole batch gives up after ``deadline`` seconds.
+    """
+    feed_paths = list(dict.fromkeys(feed_paths))
+    if not feed_paths:
+        return {}
+    client = MixcloudClient(base=base, deadline=deadline, cache=cache, offline=offline)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(feed_paths)))) as pool:
+            results = pool.map(partial(fetch_mixcloud_metadata, client=client), feed_paths)
+            return dict(zip(feed_paths, results))
+    finally:
+        client.close()
+
+def update_show_data(shows, refresh=False, offline=False, ttl=MIXCLOUD_CACHE_TTL, **fetch_options):
+    """Merge Mixcloud metadata (image, tags, description, play count) into shows.
+
+    Every Mixcloud show is looked up through the on-disk response cache, so
+    only entries older than ``ttl`` cost a (conditional) request and a
+    rebuild within the TTL changes nothing.  ``refresh`` revalidates every
+    cached entry regardless of age (``--refresh``); ``offline`` answers from
+    the cache alone.  Hand-written tags and descriptions are never
+    overwritten, and shows.json is only rewritten when a value actually
+    changed.  With a $KLOOM_DB store, only the changed shows are written,
+    each in its own transaction.
+    """
+    pending = {show.id: show.feed_path for show in shows if show.feed_path}
+
+    metadata = fetch_all_metadata(pending.values(), cache=MetadataCache(ttl=0 if refresh else ttl),
+                                  offline=offline, **fetch_options)
+    changed = []
+    missing = 0
     for show in shows:
-        if show['type'] == 'embed' and 'mixcloud' in show['embed_url']:
-            if 'image_url' not in show or not show['image_url']:
-                feed_path = extract_feed_path(show['embed_url'])
-                if feed_path:
-                    meta = fetch_mixcloud_metadata(feed_path)
-                    if meta:
-                        show['image_url'] = meta.get('pictures', {}).get('extra_large')
-                        if not show.get('tags'):
-                            show['tags'] = [t['name'] for t in meta.get('tags', [])]
-                        if not show.get('description'):
-                            show['description'] = meta.get('description', '')
-                        show['play_count'] = meta.get('play_count', 0)
-                        updated = True
-    if updated:
+        if show['id'] not in pending:
+            continue
+        meta = metadata.get(pending[show['id']])
+        if not meta:
+            missing += 1
+            continue
+        before = show.as_dict()
+        show['image_url'] = meta.get('pictures', {}).get('extra_large') or show.get('image_url')
+        if not show.get('tags'):
+            show['tags'] = [t['name'] for t in meta.get('tags', [])]
+        if not show.get('description'):
+            show['description'] = meta.get('description', '')
+        show['play_count'] = meta.get('play_count', show.get('play_count', 0))
+        if show.as_dict() != before:
+            changed.append(show)
+    if offline and missing:
+        print(f"WARNING: No cached metadata for {missing} show(s) (offline)")
+    if changed and store_path():
+        with ShowStore(store_path()) as store:
+            for show in changed:
+                store.put(show)
+        print(f"Updated {len(changed)} show(s) in {store_path().name} with new metadata.")
+    elif changed:
         save_data(shows)
         print("Updated shows.json with new metadata.")
     return shows
 
-def generate_og_image(show):
-    """Generate a per-show OG image (1200x630 PNG)."""
-    try:
-        from PIL import Image, ImageDraw, ImageFont
-    except ImportError:
-        print("WARNING: Pillow not installed — skipping OG image generation")
-        return
+# Font candidates per face; Hebrew-supporting fonts first (FreeSans has excellent Hebrew support)
+OG_FONTS = {
+    'bold': ["/usr/share/fonts/truetype/freefont/FreeSansBold.ttf",
+             "/usr/share/fonts/truetype/noto/NotoSansHebrew-Bold.ttf",
+             "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"],
+    'mono': ["/usr/share/fonts/truetype/freefont/FreeSans.ttf",
+             "/usr/share/fonts/truetype/noto/NotoSansHebrew-Regular.ttf",
+             "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"],
+}
+
+class OGRenderer:
+    """Reusable per-show OG image renderer (1200x630 PNG).
+
+    Font paths are resolved once and loaded fonts are cached by (face, size).
+    Everything that does not depend on the show (scanlines, borders, boxes,
+    glitch bars, status bar) is drawn once into a background plate that is
+    copied per image, and title layouts are memoized.  With ``palette`` set,
+    images are saved as palette PNGs of at most that many colours: the flat
+    design colours (PLATE_COLOURS) are always kept, so ``palette`` is at least
+    their count, and the remaining slots go to the most common anti-aliasing
+    shades.  Small palettes still make text edges visibly jagged.
+    """
 
     W, H = 1200, 630
     BLUE, YELLOW, MAGENTA, GREEN, BLACK, WHITE = (
         (0,0,255), (255,255,0), (255,0,255), (0,255,0), (0,0,0), (255,255,255)
     )
+    SCANLINE = (0, 0, 12)
+    PLATE_COLOURS = (BLUE, YELLOW, MAGENTA, GREEN, BLACK, WHITE, SCANLINE)
+    # main magenta box
+    BX, BY, BW, BH = 60, 140, 1080, 300
 
-    def load_font(size):
-        # Try Hebrew-supporting fonts first (FreeSans has excellent Hebrew support)
-        for p in ["/usr/share/fonts/truetype/freefont/FreeSansBold.ttf",
-                  "/usr/share/fonts/truetype/noto/NotoSansHebrew-Bold.ttf",
-                  "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"]:
-            if os.path.exists(p):
-                return ImageFont.truetype(p, size)
-        return ImageFont.load_default()
-
-    def load_mono(size):
-        # Try Hebrew-supporting fonts first (FreeSans has excellent Hebrew support)
-        for p in ["/usr/share/fonts/truetype/freefont/FreeSans.ttf",
-                  "/usr/share/fonts/truetype/noto/NotoSansHebrew-Regular.ttf",
-                  "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"]:
-            if os.path.exists(p):
-                return ImageFont.truetype(p, size)
-        return ImageFont.load_default()
-
-    img = Image.new("RGB", (W, H), BLUE)
-    d   = ImageDraw.Draw(img)
-
-    # scanlines
-    for y in range(0, H, 4):
-        d.line([(0, y), (W, y)], fill=(0, 0, 12), width=2)
-
-    # border bars
-    d.rectangle([0, 0, W, 8],   fill=BLACK)
-    d.rectangle([0, H-8, W, H], fill=BLACK)
-    d.rectangle([0, 0, 12, H],  fill=MAGENTA)
-    d.rectangle([W-12, 0, W, H], fill=MAGENTA)
-
-    # series label top-left
-    d.rectangle([60, 60, 580, 108], fill=BLACK)
-    d.text((80, 68), f"// {show.get('series','').upper()} // {show.get('date','')}", fill=YELLOW, font=load_mono(22))
-
-    # main magenta box (shadow + fill + border)
-    bx, by, bw, bh = 60, 140, 1080, 300
-    d.rectangle([bx+6, by+6, bx+bw+6, by+bh+6], fill=BLACK)
-    d.rectangle([bx, by, bx+bw, by+bh],          fill=MAGENTA)
-    d.rectangle([bx, by, bx+bw, by+bh],          outline=BLACK, width=6)
-
-    # --- title: wrap long titles across up to 3 lines ---
-    title = show.get('title', 'UNTITLED')
-    font_big  = load_font(72)
-    font_med  = load_font(52)
-    font_sm   = load_font(40)
-
-    # measure and pick the right size / line-split
-    def measure(txt, fnt):
-        return d.textlength(txt, font=fnt)
-
-    if measure(title, font_big) <= bw - 80:
-        # fits on one line at big size
-        d.text((600, 290), title, fill=BLACK, font=font_big, anchor="mm")
-    elif measure(title, font_med) <= bw - 80:
-        d.text((600, 290), title, fill=BLACK, font=font_med, anchor="mm")
-    else:
-        # split into words and wrap at med size
-        words  = title.split()
-        lines  = []
+    def __init__(self, palette=None):
+        from PIL import Image, ImageDraw, ImageFont
+        self.Image, self.ImageDraw, self.ImageFont = Image, ImageDraw, ImageFont
+        self.palette  = max(palette, len(self.PLATE_COLOURS)) if palette else None
+        self._paths   = {face: next((p for p in paths if os.path.exists(p)), None)
+                         for face, paths in OG_FONTS.items()}
+        self._fonts   = {}
+        self._layouts = {}
+        self._measure = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+        self._plate   = self._build_plate()
+
+    def font(self, face, size):
+        key = (face, size)
+        if key not in self._fonts:
+            path = self._paths[face]
+            self._fonts[key] = self.ImageFont.truetype(path, size) if path else self.ImageFont.load_default()
+        return self._fonts[key]
+
+    def measure(self, txt, fnt):
+        return self._measure.textlength(txt, font=fnt)
+
+    def _build_plate(self):
+        W, H = self.W, self.H
+        bx, by, bw, bh = self.BX, self.BY, self.BW, self.BH
+        img = self.Image.new("RGB", (W, H), self.BLUE)
+        d   = self.ImageDraw.Draw(img)
+
+        # scanlines
+        for y in range(0, H, 4):
+            d.line([(0, y), (W, y)], fill=self.SCANLINE, width=2)
+
+        # border bars
+        d.rectangle([0, 0, W, 8],   fill=self.BLACK)
+        d.rectangle([0, H-8, W, H], fill=self.BLACK)
+        d.rectangle([0, 0, 12, H],  fill=self.MAGENTA)
+        d.rectangle([W-12, 0, W, H], fill=self.MAGENTA)
+
+        # series label background top-left
+        d.rectangle([60, 60, 580, 108], fill=self.BLACK)
+
+        # main magenta box (shadow + fill + border)
+        d.rectangle([bx+6, by+6, bx+bw+6, by+bh+6], fill=self.BLACK)
+        d.rectangle([bx, by, bx+bw, by+bh],          fill=self.MAGENTA)
+        d.rectangle([bx, by, bx+bw, by+bh],          outline=self.BLACK, width=6)
+
+        # glitch bars top-right
+        for i, (off, w, col) in enumerate([(0,240,self.YELLOW),(20,200,self.GREEN),(40,180,self.MAGENTA),(0,160,self.YELLOW)]):
+            d.rectangle([900+off, 65+i*12, 900+off+w, 71+i*12], fill=col)
+
+        # bottom status bar
+        d.rectangle([0, 540, W, H-8], fill=self.BLACK)
+        d.text((80, 558), "KLOOM LO KADOSH // NOTHING IS HOLY",  fill=self.GREEN,  font=self.font('mono', 18))
+        d.text((80, 585), "THE SIGNAL IS THE MESSAGE.",           fill=self.YELLOW, font=self.font('mono', 15))
+        return img
+
+    def _wrap(self, words, fnt, max_w):
+        lines   = []
         current = ""
         for w in words:
             test = (current + " " + w).strip()
-            if measure(test, font_med) <= bw - 80:
+            if self.measure(test, fnt) <= max_w:
                 current = test
             else:
                 if current:
@@ -164,151 +814,1075 @@ def generate_og_image(show):
                 current = w
         if current:
             lines.append(current)
+        return lines
 
-        # if still too many chars per line drop to small font
-        fnt = font_med
-        if any(measure(l, font_med) > bw - 80 for l in lines):
-            fnt = font_sm
-            # re-wrap at small size
-            lines  = []
-            current = ""
-            for w in words:
-                test = (current + " " + w).strip()
-                if measure(test, fnt) <= bw - 80:
-                    current = test
-                else:
-                    if current:
-                        lines.append(current)
-                    current = w
-            if current:
-                lines.append(current)
-
-        line_h = fnt.size if hasattr(fnt, 'size') else 60
-        total_h = line_h * len(lines)
-        start_y = by + bh // 2 - total_h // 2 + line_h // 2
-        for i, line in enumerate(lines[:3]):
-            d.text((600, start_y + i * line_h), line, fill=BLACK, font=fnt, anchor="mm")
-
-    # tags row
-    tags = show.get('tags', [])[:4]
-    tx = 100
-    for tag in tags:
-        tw = int(measure(f"#{tag}", load_mono(18))) + 24
-        d.rectangle([tx, 478, tx+tw, 510], fill=WHITE, outline=BLACK, width=3)
-        d.text((tx+12, 482), f"#{tag}", fill=BLACK, font=load_mono(18))
-        tx += tw + 12
-
-    # glitch bars top-right
-    for i, (off, w, col) in enumerate([(0,240,YELLOW),(20,200,GREEN),(40,180,MAGENTA),(0,160,YELLOW)]):
-        d.rectangle([900+off, 65+i*12, 900+off+w, 71+i*12], fill=col)
-
-    # bottom status bar
-    d.rectangle([0, 540, W, H-8], fill=BLACK)
-    d.text((80, 558), "KLOOM LO KADOSH // NOTHING IS HOLY",  fill=GREEN,  font=load_mono(18))
-    d.text((80, 585), "THE SIGNAL IS THE MESSAGE.",           fill=YELLOW, font=load_mono(15))
-
-    # guest badge bottom-right if present
-    guest = show.get('guest', '')
-    if guest:
-        d.rectangle([820, 548, 1130, 614], fill=YELLOW, outline=GREEN)
-        d.text((975, 562), "GUEST",  fill=BLACK, font=load_mono(16), anchor="mm")
-        d.text((975, 590), guest,    fill=BLACK, font=load_mono(20), anchor="mm")
+    def layout_title(self, title):
+        """Pick size / line-split for a title; returns (font, [(xy, line), ...])."""
+        if title in self._layouts:
+            return self._layouts[title]
+        by, bh = self.BY, self.BH
+        max_w  = self.BW - 80
+        font_big = self.font('bold', 72)
+        font_med = self.font('bold', 52)
+        font_sm  = self.font('bold', 40)
+
+        if self.measure(title, font_big) <= max_w:
+            # fits on one line at big size
+            result = (font_big, [((600, 290), title)])
+        elif self.measure(title, font_med) <= max_w:
+            result = (font_med, [((600, 290), title)])
+        else:
+            # split into words and wrap at med size
+            words = title.split()
+            fnt   = font_med
+            lines = self._wrap(words, fnt, max_w)
+            # if still too many chars per line drop to small font and re-wrap
+            if any(self.measure(l, font_med) > max_w for l in lines):
+                fnt   = font_sm
+                lines = self._wrap(words, fnt, max_w)
+
+            line_h  = fnt.size if hasattr(fnt, 'size') else 60
+            total_h = line_h * len(lines)
+            start_y = by + bh // 2 - total_h // 2 + line_h // 2
+            result = (fnt, [((600, start_y + i * line_h), line) for i, line in enumerate(lines[:3])])
+        self._layouts[title] = result
+        return result
+
+    def render(self, show, out):
+        """Draw the OG image for `show` and save it to `out`."""
+        img = self._plate.copy()
+        d   = self.ImageDraw.Draw(img)
+
+        # series label top-left
+        d.text((80, 68), f"// {show.get('series','').upper()} // {show.get('date','')}", fill=self.YELLOW, font=self.font('mono', 22))
+
+        # title: wrap long titles across up to 3 lines
+        fnt, lines = self.layout_title(show.get('title', 'UNTITLED'))
+        for xy, line in lines:
+            d.text(xy, line, fill=self.BLACK, font=fnt, anchor="mm")
+
+        # tags row
+        tag_font = self.font('mono', 18)
+        tx = 100
+        for tag in show.get('tags', [])[:4]:
+            tw = int(self.measure(f"#{tag}", tag_font)) + 24
+            d.rectangle([tx, 478, tx+tw, 510], fill=self.WHITE, outline=self.BLACK, width=3)
+            d.text((tx+12, 482), f"#{tag}", fill=self.BLACK, font=tag_font)
+            tx += tw + 12
 
+        # guest badge bottom-right if present
+        guest = show.get('guest', '')
+        if guest:
+            d.rectangle([820, 548, 1130, 614], fill=self.YELLOW, outline=self.GREEN)
+            d.text((975, 562), "GUEST",  fill=self.BLACK, font=self.font('mono', 16), anchor="mm")
+            d.text((975, 590), guest,    fill=self.BLACK, font=self.font('mono', 20), anchor="mm")
+
+        if self.palette:
+            img = img.quantize(palette=self._palette_image(img), dither=self.Image.Dither.NONE)
+            img.save(str(out), "PNG", optimize=True)
+        else:
+            img.save(str(out), "PNG")
+        return out
+
+    def _palette_image(self, img, min_distance=24):
+        """A P-mode image holding the plate colours plus the most frequent
+        other shades of `img`, `self.palette` entries in all."""
+        colours = list(self.PLATE_COLOURS)
+        extra = self.palette - len(colours)
+        if extra > 0:
+            adaptive = img.quantize(colors=min(256, self.palette + len(colours)),
+                                    method=self.Image.Quantize.MEDIANCUT)
+            shades = adaptive.getpalette()
+            for _, i in sorted(adaptive.getcolors(), reverse=True):
+                rgb = tuple(shades[3 * i:3 * i + 3])
+                if all(sum((a - b) ** 2 for a, b in zip(rgb, c)) >= min_distance ** 2 for c in colours):
+                    colours.append(rgb)
+                    if len(colours) == self.palette:
+                        break
+        pal = self.Image.new("P", (1, 1))
+        pal.putpalette([v for rgb in colours for v in rgb])
+        return pal
+
+# One renderer per process (and palette setting), created on first use
+_og_renderers = {}
+
+def generate_og_image(show, palette=None):
+    """Generate a per-show OG image (1200x630 PNG)."""
+    renderer = _og_renderers.get(palette)
+    if renderer is None:
+        try:
+            renderer = _og_renderers[palette] = OGRenderer(palette)
+        except ImportError:
+            print("WARNING: Pillow not installed — skipping OG image generation")
+            return
     og_dir = BASE_DIR / 'assets' / 'og'
     og_dir.mkdir(parents=True, exist_ok=True)
-    out = og_dir / f"{show['id']}.png"
-    img.save(str(out), "PNG")
-    print(f"Generated OG: assets/og/{show['id']}.png")
+    return renderer.render(show, og_dir / f"{show['id']}.png")
+
+def _render_og(show, palette=None):
+    """Pool worker: render one OG image, reporting failures instead of raising.
+
+    Returns (id, path or None, error or None, (wall, cpu, bytes)).
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        out, err = generate_og_image(show, palette), None
+    except Exception as e:
+        out, err = None, f"{type(e).__name__}: {e}"
+    size = out.stat().st_size if out else 0
+    return show['id'], out, err, (time.perf_counter() - wall, time.process_time() - cpu, size)
+
+def render_og_images(shows, jobs=None, palette=None):
+    """Render OG images for `shows` across a process pool.
+
+    ``jobs`` defaults to the CPU count; ``jobs=1`` renders in-process.  Results
+    are collected in input order and one failing show never aborts the batch.
+    ``palette`` (colour count) switches to quantized PNG output.
+    Returns the set of show ids whose image was written.
+    """
+    if not shows:
+        return set()
+    if importlib.util.find_spec('PIL') is None:   # checked once here rather than in every worker
+        print("WARNING: Pillow not installed — skipping OG image generation")
+        return set()
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(shows)))
+    results = None
+    if jobs > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(partial(_render_og, palette=palette), shows,
+                                        chunksize=max(1, len(shows) // (jobs * 4))))
+        except (OSError, BrokenProcessPool) as e:
+            print(f"WARNING: OG process pool failed ({e}), rendering serially")
+    if results is None:
+        results = [_render_og(show, palette) for show in shows]
+
+    done = set()
+    for show_id, out, err, (wall, cpu, size) in results:
+        profiler.record('og_image', wall, cpu, size, show=show_id)
+        profiler.add_bytes(size)
+        if err:
+            print(f"WARNING: Could not generate OG image for {show_id}: {err}")
+        elif out:
+            done.add(show_id)
+            print(f"Generated OG: assets/og/{show_id}.png")
+    return done
+
+# --- Cover art (local, responsive copies of Mixcloud images) ---
+
+def fetch_cover(url, offline=False, timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES):
+    """Path of the cached original for an image URL, downloading it once.
+
+    Originals are kept in COVER_CACHE_DIR by URL hash and never re-fetched,
+    so builds stay reproducible if the remote image later disappears.
+    Returns None when offline and not cached, or if the download fails or is
+    not an image (an error page is never cached in place of the cover).
+    """
+    path = COVER_CACHE_DIR / (hashlib.sha1(url.encode('utf-8')).hexdigest() + '.img')
+    if path.exists() or offline:
+        return path if path.exists() else None
+    request = urllib.request.Request(url, headers={'User-Agent': 'kloom-radio-generator'})
+    for attempt in range(retries + 1):
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                data = response.read()
+            break
+        except urllib.error.HTTPError as e:
+            if e.code not in MixcloudClient.RETRY_STATUS or attempt == retries:
+                print(f"WARNING: Could not download cover {url}: HTTP {e.code}")
+                return None
+        except (OSError, http.client.HTTPException) as e:
+            if attempt == retries:
+                print(f"WARNING: Could not download cover {url}: {e}")
+                return None
+        time.sleep(0.5 * 2 ** attempt)
+    if not (data.startswith(COVER_SIGNATURES) or (data[:4] == b'RIFF' and data[8:12] == b'WEBP')):
+        print(f"WARNING: Could not download cover {url}: response is not an image")
+        return None
+    COVER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return path
+
+def cover_variants(show_id, size):
+    """(template data, output rels) for a cover whose original is `size` (w, h).
+
+    Widths wider than the original are capped rather than upscaled.  The
+    template data has ``src`` / ``width`` / ``height`` for the <img> (the
+    width/height fix the aspect ratio, so there is no layout shift), JPEG and
+    WebP ``srcset`` strings and the ``sizes`` hint.
+    """
+    w, h = size
+    widths = sorted({min(cw, w) for cw in COVER_WIDTHS})
+    rels = {(cw, fmt): f'assets/covers/{show_id}-{cw}.{fmt}' for cw in widths for fmt in ('jpg', 'webp')}
+    fallback = widths[min(1, len(widths) - 1)]
+    cover = {
+        'src':         rels[fallback, 'jpg'],
+        'width':       widths[0],
+        'height':      max(1, round(h * widths[0] / w)),
+        'srcset':      ', '.join(f"{rels[cw, 'jpg']} {cw}w" for cw in widths),
+        'webp_srcset': ', '.join(f"{rels[cw, 'webp']} {cw}w" for cw in widths),
+        'sizes':       COVER_SIZES,
+    }
+    return cover, sorted(rels.values())
+
+def render_cover(show_id, original):
+    """Encode every JPEG / WebP width of one cover to temporary files.
+
+    Returns [(tmp, target)] for the caller to move into place (see
+    _replace_if_changed), so worker threads never touch shared state.
+    """
+    from PIL import Image
+    written = []
+    (OUTPUT_DIR / 'assets' / 'covers').mkdir(parents=True, exist_ok=True)
+    with Image.open(original) as im:
+        im = im.convert('RGB')
+        w, h = im.size
+        for cw in sorted({min(cw, w) for cw in COVER_WIDTHS}):
+            resized = im if cw == w else im.resize((cw, max(1, round(h * cw / w))), Image.LANCZOS)
+            for fmt, options in (('jpg', dict(format='JPEG', quality=COVER_QUALITY['jpeg'], optimize=True, progressive=True)),
+                                 ('webp', dict(format='WEBP', quality=COVER_QUALITY['webp'], method=6))):
+                out = OUTPUT_DIR / 'assets' / 'covers' / f'{show_id}-{cw}.{fmt}'
+                tmp = out.with_name(out.name + '.tmp')
+                resized.save(tmp, **options)
+                written.append((tmp, out))
+    return written
+
+# --- Waveform peaks (local audio) ---
+
+def decode_pcm(path, rate=WAVEFORM_RATE, chunk=1 << 16):
+    """Yield raw mono signed 16-bit little-endian PCM chunks of `path` via ffmpeg."""
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-i', str(path), '-ac', '1', '-ar', str(rate), '-f', 's16le', '-']
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg not found (needed to decode audio for waveforms)") from None
+    with proc:
+        while True:
+            data = proc.stdout.read(chunk)
+            if not data:
+                break
+            yield data
+        err = proc.stderr.read().decode('utf-8', 'replace').strip()
+    if proc.returncode:
+        raise RuntimeError(f"ffmpeg failed: {err.splitlines()[-1] if err else proc.returncode}")
+
+def block_peaks(chunks, block=WAVEFORM_BLOCK):
+    """Min and max sample of every `block` samples of a PCM chunk stream.
+
+    Vectorized with NumPy when it is installed, plain Python otherwise.
+    """
+    mins, maxs = [], []
+    pending = b''
+    step = 2 * block
+    for chunk in chunks:
+        data = pending + chunk
+        usable = len(data) // step * step
+        pending = data[usable:]
+        _add_peaks(data[:usable], block, mins, maxs)
+    if len(pending) >= 2:
+        _add_peaks(pending[:len(pending) // 2 * 2], len(pending) // 2, mins, maxs)
+    if np is not None:
+        return (np.concatenate(mins) if mins else np.zeros(0, np.int16),
+                np.concatenate(maxs) if maxs else np.zeros(0, np.int16))
+    return mins, maxs
+
+def _add_peaks(data, block, mins, maxs):
+    if not data:
+        return
+    if np is not None:
+        samples = np.frombuffer(data, '<i2').reshape(-1, block)
+        mins.append(samples.min(axis=1))
+        maxs.append(samples.max(axis=1))
+        return
+    samples = array('h', data)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    for i in range(0, len(samples), block):
+        segment = samples[i:i + block]
+        mins.append(min(segment))
+        maxs.append(max(segment))
+
+def reduce_peaks(mins, maxs, buckets):
+    """`buckets` (min, max) pairs over the block peaks, as interleaved int8 bytes."""
+    n = len(mins)
+    if n == 0:
+        return bytes(2 * buckets)
+    if np is not None:
+        edges = np.arange(buckets) * n // buckets
+        out = np.empty(2 * buckets, np.int8)
+        out[0::2] = np.round(np.minimum.reduceat(mins, edges) * (127 / 32768))
+        out[1::2] = np.round(np.maximum.reduceat(maxs, edges) * (127 / 32768))
+        return out.tobytes()
+    out = array('b')
+    for b in range(buckets):
+        start = b * n // buckets
+        end = max((b + 1) * n // buckets, start + 1)
+        out.append(round(min(mins[start:end]) * (127 / 32768)))
+        out.append(round(max(maxs[start:end]) * (127 / 32768)))
+    return out.tobytes()
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(partial(f.read, 1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()[:16]
 
+def waveform_rels(show):
+    return [f"assets/waveforms/{show['id']}-{n}.bin" for n in WAVEFORM_RESOLUTIONS]
+
+def generate_waveforms(show):
+    """Write waveform peak sidecars for a local_audio show.
+
+    One file per resolution in WAVEFORM_RESOLUTIONS: that many (min, max)
+    int8 pairs, interleaved, scaled so ±127 is full scale.  Decoded peaks are
+    cached in WAVEFORM_CACHE_DIR by audio file hash, so an audio file is only
+    decoded once however often it is touched, renamed or re-checked-out.
+    Raises RuntimeError / OSError if the audio cannot be read or decoded.
+    """
+    path = OUTPUT_DIR / show['src']
+    sha = _file_sha256(path)
+    cached = [WAVEFORM_CACHE_DIR / f'{sha}-{n}.bin' for n in WAVEFORM_RESOLUTIONS]
+    if not all(c.exists() for c in cached):
+        mins, maxs = block_peaks(decode_pcm(path))
+        WAVEFORM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for n, target in zip(WAVEFORM_RESOLUTIONS, cached):
+            tmp = target.with_name(target.name + '.tmp')
+            tmp.write_bytes(reduce_peaks(mins, maxs, n))
+            os.replace(tmp, target)
+    (OUTPUT_DIR / 'assets' / 'waveforms').mkdir(parents=True, exist_ok=True)
+    for source, rel in zip(cached, waveform_rels(show)):
+        tmp = OUTPUT_DIR / (rel + '.tmp')
+        shutil.copyfile(source, tmp)
+        _replace_if_changed(tmp, OUTPUT_DIR / rel)
+    print(f"Generated waveform: {show['id']} ({', '.join(map(str, WAVEFORM_RESOLUTIONS))} buckets)")
 
 def tojson_filter(x):
     """Serialize to JSON, safe for HTML attributes (escapes < > & ')."""
-    rv = json.dumps(x, ensure_ascii=False)
+    rv = json.dumps(x, ensure_ascii=False, default=_json_default)
     rv = rv.replace('&', '\\u0026').replace('<', '\\u003c').replace('>', '\\u003e').replace("'", '\\u0027')
     return rv
 
-def generate_search_index(shows):
-    """Write client-side search index."""
-    index = [{'id': s['id'], 'title': s.get('title',''),
-              'description': s.get('description',''), 'series': s.get('series',''),
-              'guest': s.get('guest',''), 'tags': s.get('tags',[])} for s in shows]
-    with open(OUTPUT_DIR / 'search-index.json', 'w', encoding='utf-8') as f:
-        json.dump(index, f, ensure_ascii=False)
-    print("Generated: search-index.json")
-
-def generate_rss_feed(shows):
-    """Write RSS 2.0 feed."""
-    now = datetime.datetime.now(datetime.timezone.utc).strftime('%a, %d %b %Y %H:%M:%S %z')
-    items = []
+# Hebrew final letters fold to their regular forms so prefixes typed mid-word match
+HEBREW_FINALS   = str.maketrans('ךםןףץ', 'כמנפצ')
+# one-letter Hebrew prefixes (and, the, in, to, from, that, as) also indexed stripped
+HEBREW_PREFIXES = 'והבלמשכ'
+
+def normalize_search_text(text):
+    """Lower-case, strip diacritics / niqqud and fold Hebrew final letters.
+
+    Mirrored by normalize() in assets/player.js; keep the two in sync.
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.category(c).startswith('M'))
+    return text.translate(HEBREW_FINALS)
+
+def search_tokens(text):
+    """Normalized word tokens of `text`, capped at SEARCH_MAX_TOKEN characters."""
+    text = re.sub(r"['\"׳״]", '', normalize_search_text(text))
+    for token in re.findall(r'[^\W_]+', text):
+        token = token[:SEARCH_MAX_TOKEN]
+        yield token
+        if len(token) > 3 and token[0] in HEBREW_PREFIXES:
+            yield token[1:]
+
+def search_text(show):
+    """The searchable fields of a show, joined into one string."""
+    return ' '.join([show.get('title') or '', show.get('description') or '', show.get('series') or '',
+                     show.get('guest') or '', ' '.join(show.get('tags') or [])])
+
+def search_terms(tokens):
+    """Every prefix of every token, so a query token matches any word it starts."""
+    return {token[:n] for token in tokens for n in range(1, len(token) + 1)}
+
+class SearchIndexCache:
+    """Per-show search tokens and the shard layout of the last index build.
+
+    A show's distinct tokens are reused while the digest of its searchable
+    text is unchanged.  The layout ({shard key: [file name, content hash]})
+    and the doc order let an edit to a few shows patch just the shards that
+    hold their terms.  Everything is dropped when the index parameters change.
+    """
+
+    def __init__(self, path=SEARCH_CACHE_FILE):
+        self.path   = Path(path)
+        self.dirty  = False
+        self.params = [SEARCH_VERSION, SEARCH_MAX_TOKEN, SEARCH_SHARD_BYTES]
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('params') != self.params:
+            data = {}
+        self.shows  = data.get('shows', {})
+        self.order  = data.get('order', [])
+        self.layout = data.get('layout', {})
+
+    def tokens(self, show):
+        key = digest(search_text(show))
+        entry = self.shows.get(show['id'])
+        if entry and entry[0] == key:
+            return entry[1]
+        tokens = sorted(set(search_tokens(search_text(show))))
+        self.shows[show['id']] = [key, tokens]
+        self.dirty = True
+        return tokens
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'params': self.params, 'shows': self.shows, 'order': self.order,
+                           'layout': self.layout}, f, ensure_ascii=False, separators=(',', ':'))
+            self.dirty = False
+        except OSError as e:
+            print(f"WARNING: Could not save search index cache: {e}")
+
+def build_search_postings(shows, cache):
+    """Inverted index {prefix term: [compact show ids]} over the searchable fields.
+
+    Compact ids are positions in `shows`, hence already sorted.
+    """
+    postings = {}
+    for doc, s in enumerate(shows):
+        for term in search_terms(cache.tokens(s)):
+            postings.setdefault(term, []).append(doc)
+    return postings
+
+def _delta(ids):
+    return [b - a for a, b in zip([0] + ids, ids)]
+
+def _undelta(gaps):
+    return list(accumulate(gaps))
+
+def _shard_json(terms):
+    return json.dumps({t: _delta(ids) for t, ids in sorted(terms.items())}, ensure_ascii=False, separators=(',', ':'))
+
+def shard_search_postings(postings, key='', depth=1, sizes=None):
+    """Group terms into shards keyed by term prefix: {shard key: {term: postings}}.
+
+    Shards start at one character; a shard larger than SEARCH_SHARD_BYTES is
+    split on the next character, with terms no longer than its key left in
+    the parent, until every shard fits or holds a single term.  A client
+    loads the shard whose key is the longest prefix of its term.
+    """
+    if sizes is None:   # bytes each term adds to its shard's JSON ('"term":[...],')
+        sizes = {t: len(_shard_json({t: ids}).encode('utf-8')) - 1 for t, ids in postings.items()}
+    groups = {}
+    shards = {}
+    for term, ids in postings.items():
+        if len(term) < depth:
+            shards.setdefault(key, {})[term] = ids
+        else:
+            groups.setdefault(term[:depth], {})[term] = ids
+    for sub, terms in groups.items():
+        if len(terms) > 1 and sum(sizes[t] for t in terms) + 1 > SEARCH_SHARD_BYTES:
+            shards.update(shard_search_postings(terms, sub, depth + 1, sizes))
+        else:
+            shards[sub] = terms
+    return shards
+
+def patch_search_shards(edits, layout):
+    """Apply edited shows' term changes to the shards that hold those terms.
+
+    `edits` lists (compact id, old terms, new terms).  Returns {shard key:
+    terms} for the shards touched, or None when the edit doesn't fit the
+    current layout (a shard file changed on disk, or a shard emptied or
+    pushed over SEARCH_SHARD_BYTES) and a full rebuild is due.
+    """
+    touched = {}
+    for doc, old, new in edits:
+        for term in old ^ new:
+            key = next((term[:n] for n in range(len(term), 0, -1) if term[:n] in layout), term[0])
+            if key not in layout:       # a new initial letter starts a shard of its own
+                touched.setdefault(key, {})
+            elif key not in touched:
+                try:
+                    raw = (SEARCH_DIR / layout[key][0]).read_bytes()
+                except OSError:
+                    return None
+                if hashlib.sha256(raw).hexdigest() != layout[key][1]:
+                    return None
+                touched[key] = {t: _undelta(gaps) for t, gaps in json.loads(raw).items()}
+            ids = touched[key].setdefault(term, [])
+            i = bisect_left(ids, doc)
+            present = i < len(ids) and ids[i] == doc
+            if term in new and not present:
+                ids.insert(i, doc)
+            elif term in old and present:
+                del ids[i]
+            else:
+                return None
+            if not ids:
+                del touched[key][term]
+    for terms in touched.values():
+        if not terms or len(terms) > 1 and len(_shard_json(terms).encode('utf-8')) > SEARCH_SHARD_BYTES:
+            return None
+    return touched
+
+def generate_search_index(shows, cache=None):
+    """Write the sharded client-side search index under search/.
+
+    search/manifest.json lists the shard files, search/docs.json maps compact
+    ids to [show id, title, series, date], and each shard maps terms to delta-encoded posting lists.
+    When only some shows' text changed (same shows, same order) just their
+    shards are patched and rewritten; otherwise the index is rebuilt.
+    Returns the paths of the whole index (relative to OUTPUT_DIR).
+    """
+    cache = cache or SearchIndexCache()
+    SEARCH_DIR.mkdir(parents=True, exist_ok=True)
+    previous = {sid: entry[1] for sid, entry in cache.shows.items()}
+    tokens = [cache.tokens(s) for s in shows]
+    order = [s['id'] for s in shows]
+
+    shards = None
+    if order == cache.order and cache.layout and (SEARCH_DIR / 'manifest.json').exists():
+        edits = [(doc, search_terms(previous[sid]), search_terms(new))
+                 for doc, (sid, new) in enumerate(zip(order, tokens)) if previous[sid] != new]
+        shards = patch_search_shards(edits, cache.layout)
+    layout = dict(cache.layout) if shards is not None else {}
+    if shards is None:
+        shards = shard_search_postings(build_search_postings(shows, cache))
+
+    written = 0
+    oversize = []
+    for key, terms in sorted(shards.items()):
+        name = 'x' + '-'.join(f'{ord(c):x}' for c in key) + '.json'
+        body = _shard_json(terms)
+        data = body.encode('utf-8')
+        layout[key] = [name, hashlib.sha256(data).hexdigest()]
+        written += write_output(SEARCH_DIR / name, body)
+        if len(data) > SEARCH_SHARD_BYTES:
+            oversize.append(f'{key} ({len(data) // 1024} KB)')
+
+    docs = [[s['id'], s.get('title', ''), s.get('series', ''), s.get('date', '')] for s in shows]
+    write_output(SEARCH_DIR / 'docs.json', json.dumps(docs, ensure_ascii=False, separators=(',', ':')))
+    manifest = {'version': SEARCH_VERSION, 'max_token': SEARCH_MAX_TOKEN, 'encoding': 'delta',
+                'docs': 'docs.json', 'shards': {key: name for key, (name, _) in sorted(layout.items())}}
+    write_output(SEARCH_DIR / 'manifest.json', json.dumps(manifest, ensure_ascii=False, separators=(',', ':')))
+    if SEARCH_LEGACY_FILE.exists():     # player.js falls back to it only while search/ is missing
+        SEARCH_LEGACY_FILE.unlink()
+        drop_compressed(SEARCH_LEGACY_FILE)
+        print(f"Removed stale: {SEARCH_LEGACY_FILE.name}")
+
+    cache.shows  = {sid: cache.shows[sid] for sid in order}
+    cache.order  = order
+    cache.layout = layout
+    cache.dirty  = True
+    cache.save()
+    print(f"Generated: search/ ({len(layout)} shards, {written} rewritten)")
+    if oversize:
+        print(f"WARNING: single-term search shards over {SEARCH_SHARD_BYTES // 1024} KB: {', '.join(oversize)}")
+    return ['search/docs.json', 'search/manifest.json'] + [f'search/{name}' for name, _ in layout.values()]
+
+# --- Audio enclosures (podcast feeds) ---
+
+MP3_BITRATES = {  # kbit/s by bitrate index, Layer III
+    'v1': (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    'v2': (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+def _mp4_atoms(f, start, end):
+    """Yield (type, body offset, end offset) for the atoms between start and end."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            return
+        length, kind = struct.unpack('>I4s', header[:8])
+        body = pos + 8
+        if length == 1:             # 64-bit size follows the type
+            if len(header) < 16:
+                return
+            length = struct.unpack('>Q', header[8:16])[0]
+            body = pos + 16
+        elif length == 0:           # atom runs to the end of the file
+            length = end - pos
+        if length < body - pos:
+            return
+        yield kind, body, pos + length
+        pos += length
+
+def _m4a_duration(f, size):
+    """Duration in seconds from the moov/mvhd atom of an MP4 / M4A file."""
+    for kind, body, end in _mp4_atoms(f, 0, size):
+        if kind != b'moov':
+            continue
+        for kind, body, _ in _mp4_atoms(f, body, end):
+            if kind == b'mvhd':
+                f.seek(body)
+                head = f.read(32)
+                if len(head) < 20:
+                    return None
+                if head[0] == 1 and len(head) >= 32:
+                    timescale, duration = struct.unpack('>IQ', head[20:32])
+                else:
+                    timescale, duration = struct.unpack('>II', head[12:20])
+                return duration / timescale if timescale else None
+        return None
+    return None
+
+def _mp3_duration(f, size):
+    """Duration in seconds of an MPEG Layer III file.
+
+    Uses the frame count from a Xing/Info or VBRI header when present (VBR
+    files), otherwise the first frame's bitrate and the audio byte count.
+    """
+    head = f.read(10)
+    start = 0
+    if head[:3] == b'ID3' and len(head) == 10:
+        start = 10 + ((head[6] & 0x7f) << 21 | (head[7] & 0x7f) << 14 | (head[8] & 0x7f) << 7 | head[9] & 0x7f)
+        if head[5] & 0x10:          # footer present
+            start += 10
+    f.seek(start)
+    buf = f.read(64 * 1024)
+    for i in range(len(buf) - 3):
+        if buf[i] != 0xFF or buf[i + 1] & 0xE0 != 0xE0:
+            continue
+        h = int.from_bytes(buf[i:i + 4], 'big')
+        version, layer = (h >> 19) & 3, (h >> 17) & 3      # version 3 = MPEG-1, layer 1 = III
+        bitrate_idx, rate_idx = (h >> 12) & 0xF, (h >> 10) & 3
+        if version == 1 or layer != 1 or bitrate_idx in (0, 15) or rate_idx == 3:
+            continue
+        mpeg1 = version == 3
+        rate = (44100, 48000, 32000)[rate_idx] >> {3: 0, 2: 1, 0: 2}[version]
+        samples = 1152 if mpeg1 else 576
+        mono = (h >> 6) & 3 == 3
+        xing = i + 4 + ((17 if mono else 32) if mpeg1 else (9 if mono else 17))
+        if buf[xing:xing + 4] in (b'Xing', b'Info') and int.from_bytes(buf[xing + 4:xing + 8], 'big') & 1:
+            return int.from_bytes(buf[xing + 8:xing + 12], 'big') * samples / rate
+        if buf[i + 36:i + 40] == b'VBRI':
+            return int.from_bytes(buf[i + 50:i + 54], 'big') * samples / rate
+        bitrate = MP3_BITRATES['v1' if mpeg1 else 'v2'][bitrate_idx] * 1000
+        return (size - start - i) * 8 / bitrate
+    return None
+
+def probe_audio_duration(path):
+    """Duration in seconds of an .m4a/.mp4/.mp3 file, or None if unknown."""
+    probe = {'.m4a': _m4a_duration, '.mp4': _m4a_duration, '.mp3': _mp3_duration}.get(Path(path).suffix.lower())
+    if probe is None:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return probe(f, os.fstat(f.fileno()).st_size)
+    except (OSError, struct.error):
+        return None
+
+class AudioProbeCache:
+    """Enclosure length and duration of local audio files, cached in one JSON file.
+
+    Entries are keyed by path and reused while the file's size and mtime are
+    unchanged, so large audio files are only parsed once.
+    """
+
+    def __init__(self, path=AUDIO_PROBE_FILE):
+        self.path  = Path(path)
+        self.dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def probe(self, path):
+        st = os.stat(path)
+        key = str(path)
+        entry = self.entries.get(key)
+        if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns:
+            return entry
+        entry = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'duration': probe_audio_duration(path)}
+        self.entries[key] = entry
+        self.dirty = True
+        return entry
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            self.dirty = False
+        except OSError as e:
+            print(f"WARNING: Could not save audio probe cache: {e}")
+
+def audio_enclosures(shows, cache=None):
+    """{show id: enclosure dict} for local_audio shows whose src file exists."""
+    cache = cache or AudioProbeCache()
+    enclosures = {}
     for s in shows:
+        if s.get('type') != 'local_audio' or not s.get('src'):
+            continue
+        path = OUTPUT_DIR / s['src']
         try:
-            dt = datetime.datetime.strptime(s['date'], '%Y-%m-%d')
-            pub_date = dt.strftime('%a, %d %b %Y 00:00:00 +0000')
-        except (ValueError, KeyError):
-            pub_date = now
-        desc = (s.get('description') or '').replace('&','&amp;').replace('<','&lt;').replace('>','&gt;')
-        title_esc = (s.get('title') or 'Untitled').replace('&','&amp;').replace('<','&lt;').replace('>','&gt;')
-        series_esc = (s.get('series') or '').replace('&','&amp;').replace('<','&lt;').replace('>','&gt;')
+            entry = cache.probe(path)
+        except OSError as e:
+            print(f"WARNING: No enclosure for {s['id']}: {e}")
+            continue
+        if entry['duration'] is None:
+            print(f"WARNING: Could not read the duration of {s['src']}")
+        enclosures[s['id']] = {
+            'url':      s.audio_url,
+            'length':   entry['size'],
+            'type':     AUDIO_TYPES.get(path.suffix.lower(), 'application/octet-stream'),
+            'duration': entry['duration'],
+        }
+    cache.save()
+    return enclosures
+
+def _itunes_duration(seconds):
+    seconds = round(seconds)
+    return f'{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}'
+
+def _xml_escape(text):
+    return (text or '').replace('&','&amp;').replace('<','&lt;').replace('>','&gt;').replace('"', '&quot;')
+
+def _rfc822_date(date):
+    """'YYYY-MM-DD' → RFC 822 date at midnight UTC, or None if unparseable."""
+    try:
+        return datetime.datetime.strptime(date, '%Y-%m-%d').strftime('%a, %d %b %Y 00:00:00 +0000')
+    except (TypeError, ValueError):
+        return None
+
+def feed_items(shows, limit=FEED_ITEM_LIMIT, enclosures=None):
+    """The newest `limit` shows as the fields a feed item uses (newest first).
+
+    With ``enclosures`` (from audio_enclosures), items carry their enclosure.
+    """
+    newest = sorted(shows, key=lambda s: s.get('date', ''), reverse=True)
+    items = [{k: s.get(k) for k in FEED_FIELDS} for s in newest[:limit]]
+    if enclosures is not None:
+        for item in items:
+            item['enclosure'] = enclosures.get(item['id'])
+    return items
+
+def generate_rss_feed(shows, rel='feed.xml', title='KLOOM LO KADOSH',
+                      description='Nothing Is Holy. Experimental radio archive.', limit=FEED_ITEM_LIMIT,
+                      enclosures=None):
+    """Write an RSS 2.0 feed of the newest `limit` shows to OUTPUT_DIR / rel.
+
+    Passing ``enclosures`` makes it a podcast feed: iTunes channel tags, plus
+    an <enclosure> and <itunes:duration> for every item with local audio.
+
+    The output depends only on the items: lastBuildDate is the newest item's
+    date, and the file is left untouched when its bytes would not change, so
+    feed readers' conditional requests keep hitting.
+    """
+    items = []
+    dates = []
+    podcast = enclosures is not None
+    for s in feed_items(shows, limit, enclosures):
+        pub_date = _rfc822_date(s['date'])
+        if pub_date:
+            dates.append(s['date'])
+        audio = ''
+        if s.get('enclosure'):
+            e = s['enclosure']
+            audio = f'      <enclosure url="{_xml_escape(e["url"])}" length="{e["length"]}" type="{e["type"]}"/>\n'
+            if e['duration']:
+                audio += f'      <itunes:duration>{_itunes_duration(e["duration"])}</itunes:duration>\n'
         items.append(
             f'    <item>\n'
-            f'      <title>{title_esc}</title>\n'
+            f'      <title>{_xml_escape(s.get("title") or "Untitled")}</title>\n'
             f'      <link>{BASE_URL}/shows/{s["id"]}.html</link>\n'
-            f'      <description>{desc}</description>\n'
-            f'      <pubDate>{pub_date}</pubDate>\n'
-            f'      <category>{series_esc}</category>\n'
+            f'      <description>{_xml_escape(s.get("description"))}</description>\n'
+            + (f'      <pubDate>{pub_date}</pubDate>\n' if pub_date else '') +
+            f'      <category>{_xml_escape(s.get("series"))}</category>\n'
             f'      <guid isPermaLink="true">{BASE_URL}/shows/{s["id"]}.html</guid>\n'
-            f'    </item>'
+            + audio +
+            '    </item>'
         )
-    channel_items = '\n'.join(items)
+    last_build = _rfc822_date(max(dates)) if dates else None
     rss = (
         '<?xml version="1.0" encoding="UTF-8"?>\n'
-        '<rss version="2.0" xmlns:atom="http://www.w3.org/Atom">\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"'
+        + (' xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"' if podcast else '') + '>\n'
         '  <channel>\n'
-        '    <title>KLOOM LO KADOSH</title>\n'
+        f'    <title>{_xml_escape(title)}</title>\n'
         f'    <link>{BASE_URL}/</link>\n'
-        '    <description>Nothing Is Holy. Experimental radio archive.</description>\n'
-        f'    <lastBuildDate>{now}</lastBuildDate>\n'
-        f'    <atom:link href="{BASE_URL}/feed.xml" rel="self" type="application/rss+xml"/>\n'
-        + channel_items + '\n'
+        f'    <description>{_xml_escape(description)}</description>\n'
+        + (f'    <lastBuildDate>{last_build}</lastBuildDate>\n' if last_build else '') +
+        f'    <atom:link href="{BASE_URL}/{rel}" rel="self" type="application/rss+xml"/>\n'
+        + ('    <language>en</language>\n'
+           '    <itunes:author>KLOOM LO KADOSH</itunes:author>\n'
+           f'    <itunes:image href="{BASE_URL}/assets/og-image.png"/>\n'
+           '    <itunes:category text="Music"/>\n'
+           '    <itunes:explicit>false</itunes:explicit>\n' if podcast else '')
+        + ''.join(item + '\n' for item in items) +
         '  </channel>\n'
         '</rss>\n'
     )
-    with open(OUTPUT_DIR / 'feed.xml', 'w', encoding='utf-8') as f:
-        f.write(rss)
-    print("Generated: feed.xml")
-
-def generate_sitemap(shows):
-    """Write sitemap.xml."""
-    urls = [
-        f'  <url><loc>{BASE_URL}/</loc></url>',
-        f'  <url><loc>{BASE_URL}/about.html</loc></url>',
-        f'  <url><loc>{BASE_URL}/contact.html</loc></url>',
-    ]
-    for s in shows:
-        urls.append(f'  <url><loc>{BASE_URL}/shows/{s["id"]}.html</loc><lastmod>{s["date"]}</lastmod></url>')
-    sitemap = (
-        '<?xml version="1.0" encoding="UTF-8"?>\n'
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        + '\n'.join(urls) + '\n'
-        '</urlset>\n'
-    )
-    with open(OUTPUT_DIR / 'sitemap.xml', 'w', encoding='utf-8') as f:
-        f.write(sitemap)
-    print("Generated: sitemap.xml")
+    (OUTPUT_DIR / rel).parent.mkdir(parents=True, exist_ok=True)
+    if write_output(OUTPUT_DIR / rel, rss):
+        print(f"Generated: {rel}")
+    else:
+        print(f"Unchanged: {rel}")
+
+def series_feeds(query):
+    """(rel, title, member shows) for each SERIES_PAGES group with shows.
+
+    `query` is a ShowList or ShowStore.
+    """
+    for slug, title, members in SERIES_PAGES:
+        subset = query.by_series(*members)
+        if subset:
+            yield f'feeds/{slug}.xml', f'KLOOM LO KADOSH // {title}', subset
+
+def _replace_if_changed(tmp, target):
+    """Move `tmp` over `target` unless their bytes match; True if replaced."""
+    if target.exists() and filecmp.cmp(tmp, target, shallow=False):
+        tmp.unlink()
+        return False
+    profiler.add_bytes(tmp.stat().st_size)
+    os.replace(tmp, target)
+    drop_compressed(target)
+    return True
+
+class PageChanges:
+    """When each generated page's content last changed, for sitemap <lastmod>.
+
+    Entries hold the page's size, mtime and a hash of its content without the
+    build timestamp footer.  A page whose stat is unchanged is not read; one
+    whose bytes changed but hash did not (a re-render or a fresh checkout)
+    keeps its previous lastmod.
+    """
+
+    def __init__(self, path=PAGE_CHANGES_FILE):
+        self.path    = Path(path)
+        self.seen    = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def lastmod(self, rel):
+        """W3C datetime of the last content change of `rel`, or None if missing."""
+        try:
+            st = os.stat(OUTPUT_DIR / rel)
+            entry = self.entries.get(rel)
+            if not (entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns):
+                with open(OUTPUT_DIR / rel, 'rb') as f:
+                    sha = hashlib.sha256(GENERATED_STAMP.sub(b'', f.read())).hexdigest()[:16]
+                if not (entry and entry['sha'] == sha):
+                    changed = datetime.datetime.fromtimestamp(st.st_mtime, datetime.timezone.utc)
+                    entry = {'sha': sha, 'lastmod': changed.strftime('%Y-%m-%dT%H:%M:%S+00:00')}
+                entry = dict(entry, size=st.st_size, mtime=st.st_mtime_ns)
+        except OSError:
+            return None
+        self.seen[rel] = entry
+        return entry['lastmod']
+
+    def save(self):
+        """Persist the entries looked up this build (dropping pages that are gone)."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.seen, f, indent=1, sort_keys=True)
+        except OSError as e:
+            print(f"WARNING: Could not save page change log: {e}")
+
+class SitemapWriter:
+    """Streams <url> entries to disk, splitting at the sitemap protocol limits.
+
+    A site that fits one file gets a plain sitemap.xml; otherwise the parts are
+    written as sitemap-1.xml, sitemap-2.xml, ... and sitemap.xml becomes a
+    sitemap index pointing at them.  Files whose bytes are unchanged are left
+    untouched.  Entries are hashed as they are added, so the caller can check
+    the build manifest after streaming them and discard() the parts if the
+    sitemap is already up to date.
+    """
+
+    HEADER = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    FOOTER = b'</urlset>\n'
+
+    def __init__(self, max_urls=SITEMAP_MAX_URLS, max_bytes=SITEMAP_MAX_BYTES):
+        self.max_urls  = max_urls
+        self.max_bytes = max_bytes
+        self.parts     = []    # [tmp path, newest lastmod]
+        self.file      = None
+        self.sha       = hashlib.sha256()
+
+    def add(self, loc, lastmod=None):
+        line = (f'  <url><loc>{_xml_escape(loc)}</loc>'
+                + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</url>\n').encode('utf-8')
+        if (self.file is None or self.count >= self.max_urls
+                or self.size + len(line) + len(self.FOOTER) > self.max_bytes):
+            self._next_part()
+        self.file.write(line)
+        self.sha.update(line)
+        self.count += 1
+        self.size  += len(line)
+        if lastmod and (self.parts[-1][1] is None or lastmod > self.parts[-1][1]):
+            self.parts[-1][1] = lastmod
+
+    def _next_part(self):
+        self._close_part()
+        tmp = OUTPUT_DIR / f'sitemap-{len(self.parts) + 1}.xml.tmp'
+        self.file  = open(tmp, 'wb')
+        self.file.write(self.HEADER)
+        self.count = 0
+        self.size  = len(self.HEADER)
+        self.parts.append([tmp, None])
+
+    def _close_part(self):
+        if self.file is not None:
+            self.file.write(self.FOOTER)
+            self.file.close()
+            self.file = None
+
+    def digest(self):
+        """Hash of the entries added so far and the split limits."""
+        return digest('sitemap.xml', self.sha.hexdigest(), self.max_urls, self.max_bytes)
+
+    def discard(self):
+        """Drop the parts written so far, leaving the existing sitemap alone."""
+        self._close_part()
+        for tmp, _ in self.parts:
+            tmp.unlink(missing_ok=True)
+        self.parts = []
+
+    def close(self):
+        """Finish writing; returns the rels of every sitemap file (index first)."""
+        if not self.parts:
+            self._next_part()
+        self._close_part()
+        if len(self.parts) == 1:
+            self._finish(self.parts[0][0], 'sitemap.xml')
+            return ['sitemap.xml']
+        rels = []
+        index = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+        for n, (tmp, lastmod) in enumerate(self.parts, 1):
+            rel = f'sitemap-{n}.xml'
+            self._finish(tmp, rel)
+            rels.append(rel)
+            index.append(f'  <sitemap><loc>{BASE_URL}/{rel}</loc>'
+                         + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</sitemap>\n')
+        index.append('</sitemapindex>\n')
+        if write_output(OUTPUT_DIR / 'sitemap.xml', ''.join(index)):
+            print("Generated: sitemap.xml")
+        return ['sitemap.xml'] + rels
+
+    def _finish(self, tmp, rel):
+        if _replace_if_changed(tmp, OUTPUT_DIR / rel):
+            print(f"Generated: {rel}")
+
+def sitemap_pages(query, page_size=ARCHIVE_PAGE_SIZE):
+    """(loc, rel) of every page the sitemap lists."""
+    yield f'{BASE_URL}/', 'index.html'
+    for rel, _ in listing_pages(query, page_size):
+        if rel != 'index.html':
+            yield f'{BASE_URL}/{rel}', rel
+    for rel in ('about.html', 'contact.html'):
+        yield f'{BASE_URL}/{rel}', rel
+    for s in query.latest():
+        yield f'{BASE_URL}/shows/{s["id"]}.html', f'shows/{s["id"]}.html'
 
 def generate_robots_txt():
     """Write robots.txt with sitemap pointer."""
-    with open(OUTPUT_DIR / 'robots.txt', 'w', encoding='utf-8') as f:
-        f.write(f'User-agent: *\nDisallow:\n\nSitemap: {BASE_URL}/sitemap.xml\n')
+    write_output(OUTPUT_DIR / 'robots.txt', f'User-agent: *\nDisallow:\n\nSitemap: {BASE_URL}/sitemap.xml\n')
     print("Generated: robots.txt")
 
-def generate_site():
-    """Generate static site from show data."""
-    shows = load_data()
-    shows = update_show_data(shows)
-    shows.sort(key=lambda x: x['date'], reverse=True)
+def _page_file(base, n):
+    return f"{base}.html" if n == 1 else f"{base}-{n}.html"
+
+def listing_pages(query, page_size=ARCHIVE_PAGE_SIZE, latest=HOME_LATEST):
+    """Yield (filename, context) for index.html and every archive / series page.
+
+    The homepage carries only the newest `latest` shows plus links; the full
+    archive and each SERIES_PAGES group are split into pages of `page_size`
+    with rel=prev/next links.  Shows come from `query` (a ShowList or ShowStore).
+    """
+    series = [(slug, title, query.by_series(*members)) for slug, title, members in SERIES_PAGES]
+    common = {
+        'feed_url':     'feed.xml',
+        'total_shows':  query.count(),
+        'archive_url':  _page_file('archive', 1),
+        'series_links': [(title, _page_file(f'series-{slug}', 1), len(members))
+                         for slug, title, members in series if members],
+    }
+
+    yield 'index.html', dict(common, page_title='KLOOM LO KADOSH // ARCHIVE', page_path='',
+                             sections=[('LATEST TRANSMISSIONS', query.latest(latest))],
+                             pages=[], page_number=1, prev_page=None, next_page=None)
+
+    listings = [('archive', 'ARCHIVE', query.latest(), 'feed.xml')] + [
+        (f'series-{slug}', title, members, f'feeds/{slug}.xml') for slug, title, members in series if members]
+    for base, title, members, feed_url in listings:
+        chunks = [members[i:i + page_size] for i in range(0, len(members), page_size)] or [[]]
+        pages = [_page_file(base, n) for n in range(1, len(chunks) + 1)]
+        for n, chunk in enumerate(chunks, 1):
+            heading = title if len(chunks) == 1 else f"{title} // PAGE {n} OF {len(chunks)}"
+            yield pages[n - 1], dict(common, page_title=f'KLOOM LO KADOSH // {heading}', feed_url=feed_url,
+                                     page_path=pages[n - 1], sections=[(heading, chunk)],
+                                     pages=pages, page_number=n,
+                                     prev_page=pages[n - 2] if n > 1 else None,
+                                     next_page=pages[n] if n < len(chunks) else None)
+
+# --- Pre-compressed siblings (gzip_static / brotli_static) ---
+
+def compress_file(rel):
+    """Write .gz (and .br) siblings of OUTPUT_DIR / rel at maximum compression.
+
+    Siblings carry the source's mtime, so a source whose mtime has not moved
+    since the last run is skipped without being read.  Returns the number of
+    compressed bytes written.
+    """
+    src = OUTPUT_DIR / rel
+    st = src.stat()
+    data = None
+    written = 0
+    for suffix, compress in COMPRESSORS:
+        target = src.with_name(src.name + suffix)
+        try:
+            if target.stat().st_mtime_ns == st.st_mtime_ns:
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            data = src.read_bytes()
+        packed = compress(data)
+        tmp = target.with_name(f'{target.name}.{threading.get_ident()}.tmp')
+        tmp.write_bytes(packed)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, target)
+        written += len(packed)
+    return written
+
+def compress_outputs(rels, jobs=None):
+    """Compress `rels` in parallel; returns how many needed new siblings.
+
+    zlib and brotli release the GIL while compressing, so threads scale
+    across cores without pickling file contents to worker processes.
+    """
+    def run(rel):
+        try:
+            return compress_file(rel)
+        except OSError as e:
+            print(f"WARNING: Could not compress {rel}: {e}")
+            return 0
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        written = list(pool.map(run, rels))
+    profiler.add_bytes(sum(written))
+    return sum(1 for n in written if n)
+
+# Show fields that appear on the OG image; other edits leave it untouched.
+OG_FIELDS = ('id', 'title', 'series', 'date', 'tags', 'guest')
 
-    # Setup Jinja Environment (Required for 'include')
+def make_environment():
+    """Create the Jinja environment used for every page.
+
+    Compiled templates are cached on the environment and reloaded only when
+    their source changes, so a long-lived environment (``--watch``) stays warm.
+    """
     try:
         env = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)))
     except Exception as e:
@@ -317,73 +1891,355 @@ def generate_site():
 
     # Register tojson filter (HTML-attribute-safe JSON)
     env.filters['tojson'] = tojson_filter
+    return env
 
-    # Compute absolute URLs so the persistent player works across pages
-    for show in shows:
-        if show.get('src'):
-            show['audio_url'] = BASE_URL + '/' + show['src'].replace('./', '')
-        show['show_url'] = BASE_URL + '/shows/' + show['id'] + '.html'
+def generate_site(full=False, jobs=None, og_palette=None, offline=False, refresh=False, env=None,
+                  profile=False, page_size=ARCHIVE_PAGE_SIZE, feed_limit=FEED_ITEM_LIMIT, podcast=False,
+                  compress=False):
+    """Generate static site from show data.
 
-    # 1. Generate Individual Show Pages
-    try:
-        master_template = env.get_template('master_glitch.html')
-    except Exception as e:
-        print(f"ERROR: Could not load master template: {e}")
-        sys.exit(1)
+    Only outputs whose inputs changed since the last run are rebuilt; pass
+    ``full=True`` (or ``--full`` on the command line) to ignore the manifest.
+    ``jobs`` sets the OG rendering worker count (``--jobs N``, default: all cores)
+    and ``og_palette`` saves OG images as N-colour palette PNGs (``--og-palette N``).
+    Mixcloud metadata comes through the response cache: ``offline`` never
+    touches the network (``--offline``) and ``refresh`` revalidates every
+    cached entry regardless of age (``--refresh``).  ``env`` reuses an existing
+    Jinja environment from make_environment().  ``profile`` (``--profile``)
+    times every phase and show and writes a report to .cache/build-profile.json.
+    ``page_size`` sets the shows per archive / series page (``--page-size N``)
+    and ``feed_limit`` the items per RSS feed (``--feed-limit N``).  ``podcast``
+    adds audio enclosures and iTunes tags to the feeds (``--podcast``), and
+    ``compress`` writes .gz / .br siblings of the text outputs (``--compress``).
+    """
+    profiler.reset(profile)
+    with profiler.phase('load'):
+        shows = load_data()
+    with profiler.phase('metadata'):
+        shows = update_show_data(shows, refresh=refresh, offline=offline)
+    shows.sort(key=lambda x: x['date'], reverse=True)
+    query = ShowList(shows)     # the ShowStore read API, for listing pages, feeds and sitemap
 
-    # Create shows directory if it doesn't exist
-    try:
-        SHOWS_DIR.mkdir(parents=True, exist_ok=True)
-    except OSError as e:
-        print(f"ERROR: Could not create shows directory: {e}")
-        sys.exit(1)
+    with profiler.phase('prepare'):
+        manifest   = BuildManifest(full=full)
+        show_hash  = {s['id']: digest(s) for s in shows}
+        all_shows  = digest([show_hash[s['id']] for s in shows])
 
-    for show in shows:
+        # Setup Jinja Environment (Required for 'include')
+        if env is None:
+            env = make_environment()
+        templates = TemplateGraph(env)
+
+        # 1. Generate Individual Show Pages
         try:
-            # Generate OG image for this show
-            generate_og_image(show)
-
-            context = show.copy()
-            context['show']         = show          # full dict for tojson in templates
-            context['BASE_URL']     = BASE_URL
-            context['generated_at'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            output = master_template.render(context)
-            filename = f"{show['id']}.html"
-            filepath = SHOWS_DIR / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(output)
-            print(f"Generated Page: {filename}")
+            master_template = env.get_template('master_glitch.html')
         except Exception as e:
-            print(f"WARNING: Could not generate page for {show.get('id', 'unknown')}: {e}")
+            print(f"ERROR: Could not load master template: {e}")
+            sys.exit(1)
 
-    # 2. Generate Index Page (List Layout)
-    try:
-        index_template = env.get_template('index_list_glitch.html')
-        index_output = index_template.render(shows=shows, BASE_URL=BASE_URL, generated_at=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        # Create shows directory if it doesn't exist
+        try:
+            SHOWS_DIR.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(f"ERROR: Could not create shows directory: {e}")
+            sys.exit(1)
 
-        with open(OUTPUT_DIR / 'index.html', 'w', encoding='utf-8') as f:
-            f.write(index_output)
-        print("Generated Index: index.html")
-    except Exception as e:
-        print(f"ERROR: Could not generate index page: {e}")
-        sys.exit(1)
+    # OG images are CPU-bound, so they are queued here and rendered in parallel
+    with profiler.phase('og_images'):
+        og_pending = {}
+        for show in shows:
+            og_fields = {k: show.get(k) for k in OG_FIELDS}
+            # palette images: the tuple marks the plate-colour quantizer (older ones were adaptive)
+            og_key = digest('og', og_fields, og_palette and ('plate', og_palette))
+            if not manifest.fresh(f"assets/og/{show['id']}.png", og_key):
+                og_pending[show['id']] = (og_fields, og_key)
+
+        rendered = render_og_images([fields for fields, _ in og_pending.values()], jobs, og_palette)
+        for show_id, (_, og_key) in og_pending.items():
+            if show_id in rendered:
+                manifest.record(f"assets/og/{show_id}.png", og_key)
+            else:
+                manifest.invalidate(f"assets/og/{show_id}.png")
+
+    # Cover art: originals are fetched once (in parallel), then every width is
+    # re-encoded only when the image URL or the variant settings change
+    with profiler.phase('covers'):
+        covers = {}
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+            print("WARNING: Pillow not installed — pages keep hotlinked cover images")
+        wanted = [s for s in shows if s.get('image_url')] if Image else []
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            originals = dict(zip([s['id'] for s in wanted],
+                                 pool.map(lambda s: fetch_cover(s['image_url'], offline), wanted)))
+            pending = {}
+            for show in wanted:
+                original = originals[show['id']]
+                if original is None:
+                    continue
+                try:
+                    with Image.open(original) as im:
+                        cover, rels = cover_variants(show['id'], im.size)
+                except OSError as e:    # cached before downloads were checked: fetch again next build
+                    print(f"WARNING: Unreadable cover for {show['id']}, dropped from cache: {e}")
+                    original.unlink(missing_ok=True)
+                    continue
+                key = digest('cover', show['image_url'], COVER_WIDTHS, COVER_QUALITY)
+                if not manifest.fresh(rels[0], key):
+                    pending[show['id']] = (pool.submit(render_cover, show['id'], original), rels, key)
+                covers[show['id']] = cover
+            for show_id, (future, rels, key) in pending.items():
+                try:
+                    for tmp, target in future.result():
+                        _replace_if_changed(tmp, target)
+                    manifest.record(rels[0], key, rels[1:])
+                    print(f"Generated cover: {show_id}")
+                except OSError as e:
+                    covers.pop(show_id)
+                    manifest.invalidate(rels[0])
+                    print(f"WARNING: Could not generate cover for {show_id}: {e}")
+
+    # Waveform peaks, keyed on the audio file's stat; the decode itself is
+    # cached by content hash, so a touched or re-checked-out file is cheap
+    with profiler.phase('waveforms'):
+        ffmpeg = shutil.which('ffmpeg')     # checked once here rather than failing per show
+        no_ffmpeg = []
+        for show in shows:
+            if show['type'] != 'local_audio':
+                continue
+            rels = waveform_rels(show)
+            try:
+                st = os.stat(OUTPUT_DIR / show['src'])
+                key = digest('waveform', st.st_size, st.st_mtime_ns, WAVEFORM_RESOLUTIONS, WAVEFORM_RATE)
+                if manifest.fresh(rels[0], key):
+                    continue
+                if not ffmpeg:
+                    manifest.invalidate(rels[0])
+                    no_ffmpeg.append(show['id'])
+                    continue
+                generate_waveforms(show)
+                manifest.record(rels[0], key, rels[1:])
+            except (OSError, RuntimeError) as e:
+                manifest.invalidate(rels[0])
+                print(f"WARNING: Could not generate waveform for {show['id']}: {e}")
+        if no_ffmpeg:
+            print(f"Skipped waveforms: {len(no_ffmpeg)} local audio show(s) (ffmpeg not installed)")
+
+    with profiler.phase('show_pages'):
+        for show in shows:
+            filename = f"{show['id']}.html"
+            page_rel = f"shows/{filename}"
+            page_key = digest('page', show_hash[show['id']], templates.digest('master_glitch.html'), BASE_URL)
+            if manifest.fresh(page_rel, page_key):
+                continue
+            with profiler.phase('show_page', show=show['id']):
+                try:
+                    context = show.as_dict(derived=True)
+                    context['show']         = show          # full record for tojson in templates
+                    context['BASE_URL']     = BASE_URL
+                    context['generated_at'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    output = master_template.render(context)
+                    write_output(SHOWS_DIR / filename, output)
+                    manifest.record(page_rel, page_key)
+                    print(f"Generated Page: {filename}")
+                except Exception as e:
+                    manifest.invalidate(page_rel)
+                    print(f"WARNING: Could not generate page for {show.get('id', 'unknown')}: {e}")
+
+    # 2. Generate Index, Archive and Series Pages (List Layout)
+    with profiler.phase('listing_pages'):
+        try:
+            index_template = env.get_template('index_list_glitch.html')
+        except Exception as e:
+            print(f"ERROR: Could not load index template: {e}")
+            sys.exit(1)
+        index_templates = templates.digest('index_list_glitch.html')
+        for rel, context in listing_pages(query, page_size):
+            context = dict(context, covers={s['id']: covers[s['id']] for _, chunk in context['sections']
+                                            for s in chunk if s['id'] in covers})
+            key = digest(rel, context, index_templates, BASE_URL)
+            if manifest.fresh(rel, key):
+                continue
+            try:
+                output = index_template.render(context, BASE_URL=BASE_URL, generated_at=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                write_output(OUTPUT_DIR / rel, output)
+                manifest.record(rel, key)
+                print(f"Generated Index: {rel}")
+            except Exception as e:
+                print(f"ERROR: Could not generate {rel}: {e}")
+                sys.exit(1)
 
     # 3. Generate support files
-    generate_search_index(shows)
-    generate_rss_feed(shows)
-    generate_sitemap(shows)
-    generate_robots_txt()
+    search_key = digest('search', all_shows, SEARCH_VERSION, SEARCH_SHARD_BYTES, SEARCH_MAX_TOKEN)
+    if not manifest.fresh('search/manifest.json', search_key):
+        with profiler.phase('search_index'):
+            written = generate_search_index(shows)
+        manifest.record('search/manifest.json', search_key, written)
+    with profiler.phase('feeds'):
+        enclosures = audio_enclosures(shows) if podcast else None
+        for rel, title, members in [('feed.xml', 'KLOOM LO KADOSH', shows), *series_feeds(query)]:
+            key = digest(rel, title, feed_items(members, feed_limit, enclosures), BASE_URL)
+            if not manifest.fresh(rel, key):
+                generate_rss_feed(members, rel, title, limit=feed_limit, enclosures=enclosures)
+                manifest.record(rel, key)
+    if not manifest.fresh('robots.txt', digest('robots.txt', BASE_URL)):
+        with profiler.phase('robots.txt'):
+            generate_robots_txt()
+        manifest.record('robots.txt', digest('robots.txt', BASE_URL))
 
     # 4. Generate static pages (about, contact)
     for page_name in ['about', 'contact']:
+        rel = f'{page_name}.html'
+        key = digest(rel, templates.digest(rel), BASE_URL)
+        if manifest.fresh(rel, key):
+            continue
+        with profiler.phase(rel):
+            try:
+                tmpl = env.get_template(rel)
+                output = tmpl.render(BASE_URL=BASE_URL, generated_at=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                write_output(OUTPUT_DIR / rel, output)
+                manifest.record(rel, key)
+                print(f"Generated: {rel}")
+            except Exception as e:
+                manifest.invalidate(rel)
+                print(f"WARNING: Could not generate {rel}: {e}")
+
+    # 5. Sitemap, last: <lastmod> is when each page's content last changed
+    with profiler.phase('sitemap.xml'):
+        changes = PageChanges()
+        writer = SitemapWriter()    # streamed: no list of every page is kept
+        for loc, rel in sitemap_pages(query, page_size):
+            writer.add(loc, changes.lastmod(rel))
+        changes.save()
+        key = writer.digest()
+        if manifest.fresh('sitemap.xml', key):
+            writer.discard()
+        else:
+            manifest.record('sitemap.xml', key, writer.close()[1:])
+
+    # 6. Pre-compressed siblings for servers with gzip_static / brotli_static
+    if compress:
+        with profiler.phase('compress'):
+            rels = sorted(r for r in manifest.seen if r.endswith(COMPRESS_SUFFIXES)) + COMPRESS_STATIC
+            print(f"Compressed: {compress_outputs(rels, jobs)} of {len(rels)} files"
+                  f" ({', '.join(suffix for suffix, _ in COMPRESSORS)})")
+    else:
+        # generated files drop their siblings when rewritten; hand-edited ones here
+        for rel in COMPRESS_STATIC:
+            try:
+                drop_compressed(OUTPUT_DIR / rel, (OUTPUT_DIR / rel).stat().st_mtime_ns)
+            except FileNotFoundError:
+                pass
+
+    with profiler.phase('manifest'):
+        manifest.prune()
+        manifest.save()
+    manifest.report()
+    profiler.report()
+
+def _watch_snapshot():
+    """(mtime, size) of every watched source file.
+
+    Generated OG images, waveforms and covers under assets/ are excluded so a
+    build never retriggers itself.
+    """
+    snapshot = {}
+    def scan(directory):
         try:
-            tmpl = env.get_template(f'{page_name}.html')
-            output = tmpl.render(BASE_URL=BASE_URL, generated_at=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-            with open(OUTPUT_DIR / f'{page_name}.html', 'w', encoding='utf-8') as f:
-                f.write(output)
-            print(f"Generated: {page_name}.html")
-        except Exception as e:
-            print(f"WARNING: Could not generate {page_name}.html: {e}")
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.is_dir():
+                if Path(entry.path) not in [BASE_DIR / 'assets' / d for d in ('og', 'waveforms', 'covers')]:
+                    scan(entry.path)
+            elif entry.is_file():
+                st = entry.stat()
+                snapshot[os.path.relpath(entry.path, BASE_DIR)] = (st.st_mtime_ns, st.st_size)
+    db = store_path()
+    for path in [DATA_FILE] if db is None else [db, db.with_name(db.name + '-wal')]:
+        try:
+            st = path.stat()
+            snapshot[os.path.relpath(path, BASE_DIR)] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            pass
+    scan(TEMPLATE_DIR)
+    scan(BASE_DIR / 'assets')
+    return snapshot
+
+def watch_site(interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE, **build_options):
+    """Rebuild whenever shows.json, a template or an asset changes.
+
+    Polls file stats every ``interval`` seconds (a few dozen files, so this
+    costs microseconds) and waits until no file has changed for ``debounce``
+    seconds before rebuilding.  The Jinja environment is kept warm across
+    rebuilds and the build manifest limits each rebuild to affected outputs.
+    """
+    env = make_environment()
+    generate_site(env=env, **build_options)
+    snapshot = _watch_snapshot()
+    print(f"Watching {os.path.relpath(store_path() or DATA_FILE, BASE_DIR)}, templates/ and assets/ (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            current = _watch_snapshot()
+            if current == snapshot:
+                continue
+            # let a burst of saves settle before rebuilding
+            while True:
+                time.sleep(debounce)
+                settled = _watch_snapshot()
+                if settled == current:
+                    break
+                current = settled
+            changed = sorted(k for k in set(snapshot) | set(current) if snapshot.get(k) != current.get(k))
+            print(f"\nChanged: {', '.join(changed)}")
+            started = time.perf_counter()
+            try:
+                generate_site(env=env, **build_options)
+                print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms")
+            except SystemExit:
+                print("Build failed; waiting for the next change.")
+            except Exception as e:
+                print(f"ERROR: Rebuild failed: {e}")
+            # re-snapshot so files written by the build itself are not seen as edits
+            snapshot = _watch_snapshot()
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+def positive_int_option(flag):
+    """The integer after `flag` on the command line; exits with a usage error unless it is >= 1."""
+    try:
+        value = int(sys.argv[sys.argv.index(flag) + 1])
+    except (IndexError, ValueError):
+        value = 0
+    if value < 1:
+        print(f"ERROR: {flag} must be a positive integer (usage: {flag} N)")
+        sys.exit(1)
+    return value
 
 if __name__ == "__main__":
-    generate_site()
\ No newline at end of file
+    jobs = None
+    if "--jobs" in sys.argv:
+        jobs = int(sys.argv[sys.argv.index("--jobs") + 1])
+    og_palette = None
+    if "--og-palette" in sys.argv:
+        og_palette = int(sys.argv[sys.argv.index("--og-palette") + 1])
+        if og_palette < len(OGRenderer.PLATE_COLOURS):
+            print(f"WARNING: --og-palette {og_palette} is below the {len(OGRenderer.PLATE_COLOURS)} "
+                  "design colours; using that many")
+            og_palette = len(OGRenderer.PLATE_COLOURS)
+    options = dict(full="--full" in sys.argv, jobs=jobs, og_palette=og_palette,
+                   offline="--offline" in sys.argv, refresh="--refresh" in sys.argv,
+                   profile="--profile" in sys.argv, podcast="--podcast" in sys.argv,
+                   compress="--compress" in sys.argv)
+    if "--page-size" in sys.argv:
+        options['page_size'] = positive_int_option("--page-size")
+    if "--feed-limit" in sys.argv:
+        options['feed_limit'] = positive_int_option("--feed-limit")
+    if "--watch" in sys.argv:
+        watch_site(**options)
+    else:
+        generate_site(**options)
@@ -2,26 +2,53 @@
 """
 kloom_ssh.py  ─  Teletext SSH radio  ─  Kloom Lo Kadosh
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-  Run:     python3 kloom_ssh.py [--port N]
+  Run:     python3 kloom_ssh.py [--port N] [--fps N] [--idle-fps N] [--stats N]
   Connect: ssh -p 2222 localhost        (no auth required)
   Deploy:  long-lived process on a VPS, expose port 2222.
 """
 
-import asyncio, asyncssh, json, os, sys, random, time, re
+import asyncio, asyncssh, json, os, sys, random, sqlite3, time, re
+from functools import lru_cache
 from pathlib import Path
-from urllib.parse import urlparse, parse_qs, unquote
 from datetime import datetime
+from kloom_store import ShowList, ShowStore, load_shows, store_path
 
 # ─── config ───────────────────────────────────────────────────────────────────
 BASE_DIR  = Path(__file__).resolve().parent
 DATA_FILE = BASE_DIR / "data" / "shows.json"
 HOST_KEY  = BASE_DIR / ".kloom_ssh_host_key"
 W         = 80                            # full terminal width
+REPAINT_INTERVAL = 60.0                   # full redraw at least this often (s)
+RENDER_CACHE_SIZE = 512                   # rendered static pages shared by all sessions
+RELOAD_INTERVAL  = 2.0                    # how often to check shows.json for changes (s)
 
 PORT = 2222
 if "--port" in sys.argv:
     PORT = int(sys.argv[sys.argv.index("--port") + 1])
 
+# animation: frames per second, and for sessions without a keypress in IDLE_AFTER s
+FPS, IDLE_FPS, IDLE_AFTER = 2.0, 0.2, 120.0
+try:
+    if "--fps" in sys.argv:
+        FPS = float(sys.argv[sys.argv.index("--fps") + 1])
+    if "--idle-fps" in sys.argv:
+        IDLE_FPS = float(sys.argv[sys.argv.index("--idle-fps") + 1])
+except (IndexError, ValueError):
+    FPS = IDLE_FPS = 0.0
+if not (FPS > 0 and 0 < IDLE_FPS <= FPS):
+    print("ERROR: --fps and --idle-fps must be positive numbers, --idle-fps no higher than --fps "
+          "(usage: --fps N --idle-fps M)")
+    sys.exit(1)
+
+# output flow control: with WRITE_HIGH bytes in flight (written but not yet
+# acknowledged by the client's SSH window adjusts) beyond the client's usual
+# acknowledgement batch, a session's frames are dropped until it is back within
+# WRITE_LOW of it; stuck for STUCK_AFTER s, it is cut off
+WRITE_HIGH, WRITE_LOW, STUCK_AFTER = 64 * 1024, 16 * 1024, 30.0
+STATS_INTERVAL = 0                        # --stats N: print session stats every N s
+if "--stats" in sys.argv:
+    STATS_INTERVAL = float(sys.argv[sys.argv.index("--stats") + 1])
+
 # ─── ANSI (256 color + effects) ──────────────────────────────────────────────
 class A:
     R   = "\033[0m"
@@ -52,6 +79,8 @@ class A:
 
     # control
     CLR = "\033[2J\033[H"
+    EL  = "\033[2K"      # erase line
+    ED  = "\033[J"       # erase below cursor
     HID = "\033[?25l"; SHW = "\033[?25h"
 
     # cursor movement
@@ -116,24 +145,74 @@ def random_vu():
     return [random.random() * 0.3 + 0.1 + (0.5 if random.random() > 0.7 else 0) for _ in range(8)]
 
 # ─── data ────────────────────────────────────────────────────────────────────
-with open(DATA_FILE, encoding="utf-8") as _fh:
-    SHOWS = sorted(json.load(_fh), key=lambda s: s["date"], reverse=True)
+def _open_shows():
+    """The $KLOOM_DB store, or a ShowList over shows.json; both answer the same queries."""
+    db = store_path()
+    if not db:
+        with open(DATA_FILE, encoding="utf-8") as fh:
+            return ShowList(load_shows(json.load(fh)))
+    if not db.exists():
+        raise FileNotFoundError(f"show database not found at {db} (create it with: python3 kloom_store.py import)")
+    return ShowStore(db, readonly=True)
+
+def _load_catalog():
+    """A Catalog of the archive sections, each queried by series, newest first."""
+    with _open_shows() as shows:
+        return Catalog(shows.count(), [(title, shows.by_series(*series)) for title, series in _SECTIONS])
+
+def _source_stamp():
+    """(mtime, size) of every file the show list is read from, to spot edits."""
+    db = store_path()
+    paths = [db, Path(str(db) + "-wal")] if db else [DATA_FILE]
+    stamp = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
 
 _SECTIONS = [
-    ("KLOOM ORIGINALS",  lambda s: s["series"] in ("Kloom Lo Kadosh", "Radio Art 106")),
-    ("NOTHING IS HOLY",  lambda s: s["series"] == "Nothing Is Holy"),
-    ("KOL HAZUTI",       lambda s: s["series"] == "Kol Hazuti"),
+    ("KLOOM ORIGINALS",  ("Kloom Lo Kadosh", "Radio Art 106")),
+    ("NOTHING IS HOLY",  ("Nothing Is Holy",)),
+    ("KOL HAZUTI",       ("Kol Hazuti",)),
 ]
 
-FLAT: list = []
-for _t, _p in _SECTIONS:
-    _h = [s for s in SHOWS if _p(s)]
-    if _h:
-        FLAT.append(("h", _t))
-        FLAT.extend(("s", s) for s in _h)
-
-SHOW_IDXS  = [i for i, (k, _) in enumerate(FLAT) if k == "s"]
-SHOW_COUNT = len(SHOW_IDXS)
+class Catalog:
+    """One snapshot of the show list and the archive layout built from it.
+
+    Never modified once built: a reload builds a new Catalog and swaps the
+    CATALOG global, and each session moves to it at its next draw or key.
+    ``flat`` is the archive as ("h", section title) / ("s", show) rows and
+    ``show_idxs`` the rows holding shows, so ``sel`` indexes ``show_idxs``.
+    ``total`` counts every show, listed in a section or not.
+    """
+    __slots__ = ("total", "flat", "show_idxs", "count", "by_id")
+
+    def __init__(self, total, sections):
+        self.total = total
+        self.flat = []
+        for title, section in sections:
+            if section:
+                self.flat.append(("h", title))
+                self.flat.extend(("s", s) for s in section)
+        self.show_idxs = [i for i, (k, _) in enumerate(self.flat) if k == "s"]
+        self.count = len(self.show_idxs)
+        self.by_id = {self.flat[i][1]["id"]: self.flat[i][1] for i in self.show_idxs}
+
+    def show(self, sel):
+        return self.flat[self.show_idxs[sel]][1]
+
+    def index(self, show_id):
+        """`sel` of the show with `show_id` in the archive, or None."""
+        return next((i for i, row in enumerate(self.show_idxs) if self.flat[row][1]["id"] == show_id), None)
+
+try:
+    CATALOG = _load_catalog()
+except FileNotFoundError as e:
+    print(f"ERROR: {e}")
+    sys.exit(1)
 
 _BADGE = {
     "local_audio": ("●", A.BGR),
@@ -141,18 +220,6 @@ _BADGE = {
     "youtube":     ("▶", A.BRD),
 }
 
-def _listen_url(show):
-    if show["type"] == "local_audio":
-        return f"https://willbearfruits.github.io/kloom-radio/shows/{show['id']}.html"
-    if show["type"] == "embed":
-        q = parse_qs(urlparse(show["embed_url"]).query)
-        if "feed" in q:
-            return "https://www.mixcloud.com" + unquote(q["feed"][0])
-        return show["embed_url"]
-    if show["type"] == "youtube":
-        return "https://www.youtube.com/watch?v=" + show["embed_url"].rstrip("/").split("/")[-1]
-    return None
-
 # ─── shared state ────────────────────────────────────────────────────────────
 _now_playing = None
 _listeners   = 0
@@ -189,10 +256,12 @@ def box_top(title="", color=A.MG, width=W):
         return color + BOX['tl'] + BOX['h'] * side + A.R + A.B + A.YL + title + A.R + color + BOX['h'] * (width - side - len(title) - 2) + BOX['tr'] + A.R
     return color + BOX['tl'] + BOX['h'] * (width - 2) + BOX['tr'] + A.R
 
+_SGR = re.compile(r'\033\[[0-9;]*m')
+
 def box_mid(content="", color=A.MG, width=W, align="left"):
     """Draw box middle row."""
     # strip ANSI for length calculation
-    visible = re.sub(r'\033\[[0-9;]*m', '', content)
+    visible = _SGR.sub('', content)
     padding = width - len(visible) - 2
     if align == "center":
         left_pad = padding // 2
@@ -264,7 +333,7 @@ def page_splash(frame=0):
         vu_display = "  ".join(vu_bar(l, 4) for l in vu_levels)
         L.append(box_mid(vu_display, A.GR, align="center"))
 
-        url = _listen_url(_now_playing)
+        url = _now_playing.listen_url
         if url:
             clickable = A.link(url, A.UL + A.BCY + url[:W-6] + A.R)
             L.append(box_mid(clickable, A.GR))
@@ -300,12 +369,13 @@ def page_splash(frame=0):
 
     return "\n".join(L)
 
-def page_archive(sel, scroll_offset=0):
+def page_archive(sel, scroll_offset=0, catalog=None):
+    catalog = catalog or CATALOG
     L = []
 
     # header
     L.append(A.MG + "█" * W + A.R)
-    L.append(box_mid(f"{A.BMG}{MINI_LOGO}{A.R}  {A.B}{A.YL}ARCHIVE{A.R}  {A.fg(245)}[{len(SHOWS)} shows]{A.R}", A.MG, align="center"))
+    L.append(box_mid(f"{A.BMG}{MINI_LOGO}{A.R}  {A.B}{A.YL}ARCHIVE{A.R}  {A.fg(245)}[{catalog.total} shows]{A.R}", A.MG, align="center"))
     L.append(A.MG + "█" * W + A.R)
     L.append("")
 
@@ -314,7 +384,7 @@ def page_archive(sel, scroll_offset=0):
     show_i = 0
     visible_items = []
 
-    for kind, val in FLAT:
+    for kind, val in catalog.flat:
         if kind == "h":
             visible_items.append(("h", val, -1))
         else:
@@ -337,7 +407,7 @@ def page_archive(sel, scroll_offset=0):
             L.append(f"  {A.MG}{A.B}└{'─' * (len(val) + 2)}┘{A.R}")
         else:
             active = (idx == sel)
-            badge_char, badge_color = _BADGE.get(val["type"], ("?", A.WH))
+            badge_char, badge_color = _BADGE[val.badge]
 
             if active:
                 # selected item - full highlight
@@ -364,7 +434,7 @@ def page_detail(show, frame=0, show_url_popup=False):
 
     # URL popup overlay
     if show_url_popup:
-        url = _listen_url(show)
+        url = show.listen_url
         L.append("")
         L.append(A.MG + "█" * W + A.R)
         L.append(box_top("LISTEN URL", A.BGR))
@@ -388,7 +458,7 @@ def page_detail(show, frame=0, show_url_popup=False):
 
     # header
     L.append(A.MG + "█" * W + A.R)
-    badge_char, badge_color = _BADGE.get(show["type"], ("?", A.WH))
+    badge_char, badge_color = _BADGE[show.badge]
     L.append(box_mid(f"{badge_color}{badge_char}{A.R}  {A.B}{A.YL}{show['title'][:W-10]}{A.R}", A.MG, align="center"))
     L.append(A.MG + "█" * W + A.R)
     L.append("")
@@ -438,7 +508,7 @@ def page_detail(show, frame=0, show_url_popup=False):
     L.append("")
 
     # listen URL - clickable!
-    url = _listen_url(show)
+    url = show.listen_url
     if url:
         L.append(f"  {A.fg(245)}Listen:{A.R}")
         clickable = A.link(url, A.UL + A.BCY + url[:W-4] + A.R)
@@ -584,6 +654,49 @@ def page_intro(frame):
 
     return "\n".join(L)
 
+# ─── render cache ────────────────────────────────────────────────────────────
+_PAGES = {"archive": page_archive, "about": page_about, "help": page_help}
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_page(name, *args):
+    """Pages that depend only on their arguments, rendered once for everyone.
+
+    Cleared by set_now_playing() (and whenever the show list changes), since
+    those feed every page.
+    """
+    return _PAGES[name](*args)
+
+def set_now_playing(show):
+    global _now_playing
+    _now_playing = show
+    render_page.cache_clear()
+
+# ─── hot reload ──────────────────────────────────────────────────────────────
+async def watch_catalog(interval=RELOAD_INTERVAL):
+    """Swap in a new Catalog whenever the show source changes on disk.
+
+    Loading and validation run in a worker thread; a file that fails to load
+    (e.g. caught mid-save) keeps the current catalog until the next change.
+    """
+    global CATALOG
+    stamp = _source_stamp()
+    while True:
+        await asyncio.sleep(interval)
+        current = _source_stamp()
+        if current == stamp:
+            continue
+        stamp = current
+        try:
+            catalog = await asyncio.to_thread(_load_catalog)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"  {A.RD}!{A.R} show list not reloaded: {e}", flush=True)
+            continue
+        CATALOG = catalog
+        if _now_playing:
+            set_now_playing(catalog.by_id.get(_now_playing["id"]))
+        render_page.cache_clear()
+        print(f"  {A.CY}↻{A.R} reloaded {catalog.total} shows", flush=True)
+
 # ─── input parsing ───────────────────────────────────────────────────────────
 _ARROWS = {b"\x1b[A", b"\x1b[B", b"\x1b[C", b"\x1b[D"}
 
@@ -599,12 +712,100 @@ def _parse_all(raw: bytes) -> list:
             i += 1
     return keys
 
+# ─── screen ──────────────────────────────────────────────────────────────────
+_ANSI = re.compile(r'\033\[[0-9;]*m|\033\]8;;[^\033]*\033\\')
+
+def _fits(line, cols):
+    """True when `line` will not wrap on a `cols` wide terminal."""
+    return len(line) <= cols or len(_ANSI.sub('', line)) <= cols
+
+class Screen:
+    """The lines a client's terminal currently shows.
+
+    render() turns a page into the bytes that bring the terminal up to date:
+    only the changed lines, each rewritten in place, or a full clear-and-redraw
+    when the screen state is unknown (first frame, resize, Ctrl+L, a line that
+    wraps, a page taller than the terminal changing length) and every
+    REPAINT_INTERVAL seconds in case the terminal got out of step anyway.
+    """
+    __slots__ = ("cols", "rows", "lines", "page", "painted")
+
+    def __init__(self, cols=0, rows=0):
+        self.resize(cols, rows)
+
+    def resize(self, cols, rows):
+        self.cols, self.rows = cols, rows
+        self.invalidate()
+
+    def invalidate(self):
+        self.lines = self.page = None
+
+    def _repaint(self, page, lines):
+        self.painted = time.monotonic()
+        # without a known size, or with wrapped lines, rows can't be addressed
+        known = self.cols and self.rows and all(_fits(l, self.cols) for l in lines)
+        self.lines = lines if known else None
+        self.page  = page if known else None
+        return A.CLR + A.bK + A.HID + page
+
+    def render(self, page, diffs=None):
+        """Bytes to send for `page`; `diffs` shares diffs between screens that
+        showed the same page before (the animation clock passes one per tick)."""
+        if self.lines is None or time.monotonic() - self.painted > REPAINT_INTERVAL:
+            return self._repaint(page, page.split("\n"))
+        if page is self.page:   # the same cached render as last time
+            return ""
+        key = (self.page, page, self.cols, self.rows)
+        diff = diffs.get(key) if diffs is not None else None
+        if diff is None:
+            diff = self._diff(page)
+            if diff is None:
+                return self._repaint(page, page.split("\n"))
+            if diffs is not None:
+                diffs[key] = diff
+        out, self.lines = diff
+        self.page = page
+        return out
+
+    def _diff(self, page):
+        """(changed-line updates, lines) from the current screen, or None if
+        only a full repaint will do."""
+        lines, old = page.split("\n"), self.lines
+        # a page taller than the terminal has scrolled: row 1 shows line `top`
+        top = max(0, len(lines) - self.rows)
+        if len(lines) != len(old) and (top or len(old) > self.rows):
+            return None
+        out = []
+        for i in range(top, len(lines)):
+            line = lines[i]
+            if i < len(old) and line == old[i]:
+                continue
+            if not _fits(line, self.cols):
+                return None
+            out.append(A.goto(i - top + 1, 1) + A.R + A.EL + (A.bK if i == 0 else "") + line)
+        if len(lines) < len(old):
+            out.append(A.goto(len(lines) - top + 1, 1) + A.R + A.ED)
+        return "".join(out), lines
+
 # ─── session ─────────────────────────────────────────────────────────────────
 class Session:
-    __slots__ = ("proc", "state", "sel", "detail", "frame", "scroll_offset", "intro_done", "show_url_popup")
+    __slots__ = ("proc", "state", "sel", "detail", "frame", "scroll_offset", "intro_done", "show_url_popup",
+                 "screen", "last_key", "pending", "blocked_since", "drained",
+                 "sent", "frames", "dropped", "peak_in_flight", "catalog", "window",
+                 "ack_batch", "last_in_flight")
 
     def __init__(self, proc):
         self.proc   = proc
+        self.screen = Screen(*proc.get_terminal_size()[:2])
+        self.last_key = time.monotonic()
+        self.pending = False          # a frame was dropped; draw once caught up
+        self.blocked_since = None     # when the client last acknowledged output while held
+        self.drained = 0
+        self.sent = self.frames = self.dropped = self.peak_in_flight = 0
+        # the client's initial receive window, before anything is written
+        self.window = getattr(proc.channel, "_send_window", None)
+        self.ack_batch = self.last_in_flight = 0
+        self.catalog = CATALOG
         self.state  = "intro"
         self.sel    = 0
         self.detail = None
@@ -613,29 +814,135 @@ class Session:
         self.intro_done = False
         self.show_url_popup = False
 
-    def _draw(self):
+    def _draw(self, renders=None, diffs=None):
+        """Bring the terminal up to date.  The animation clock passes per-tick
+        `renders` / `diffs` dicts so identical frames are built only once."""
+        in_flight = self.in_flight()
+        if self.backed_up(in_flight):
+            self.hold(in_flight)
+            return
+        self.pending = False
+        self.blocked_since = None
+        self._sync()
+
+        def shared(key, render, *args):
+            if renders is None:
+                return render(*args)
+            if key not in renders:
+                renders[key] = render(*args)
+            return renders[key]
+
+        frame = CLOCK.frame
         if self.state == "intro":
-            page = page_intro(self.frame)
+            # the intro runs on the session's own frame count, from connect
+            page = shared(("intro", self.frame), page_intro, self.frame)
+            self.frame += 1
             if page is None:
                 self.state = "splash"
                 self.intro_done = True
-                page = page_splash(self.frame)
-        elif self.state == "archive":
-            page, self.scroll_offset = page_archive(self.sel, self.scroll_offset)
+        if self.state == "archive":
+            page, self.scroll_offset = render_page("archive", self.sel, self.scroll_offset, self.catalog)
         elif self.state == "detail":
-            page = page_detail(self.detail, self.frame, self.show_url_popup)
+            page = shared(("detail", self.detail["id"], self.show_url_popup),
+                          page_detail, self.detail, frame, self.show_url_popup)
         elif self.state == "about":
-            page = page_about(self.frame)
+            page = render_page("about")
         elif self.state == "help":
-            page = page_help()
-        else:
-            page = page_splash(self.frame)
-        self.proc.stdout.write(A.CLR + A.bK + A.HID + page)
-        self.frame += 1
+            page = render_page("help")
+        elif self.state == "splash":
+            page = shared(("splash",), page_splash, frame)
+        out = self.screen.render(page, diffs)
+        if out:
+            self.proc.stdout.write(out)
+            self.sent += len(out.encode())
+            self.frames += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight())
+
+    def _sync(self):
+        """Move to the current CATALOG, keeping the selected and open shows
+        where they still exist and clamping to the new list where not."""
+        old, new = self.catalog, CATALOG
+        if old is new:
+            return
+        self.catalog = new
+        sel = new.index(old.show(self.sel)["id"]) if self.sel < old.count else None
+        self.sel = sel if sel is not None else max(0, min(self.sel, new.count - 1))
+        if self.detail is not None:
+            self.detail = new.by_id.get(self.detail["id"])
+            if self.detail is None and self.state == "detail":
+                self.state = "archive"
+                self.show_url_popup = False
+
+    # ── flow control ──
+
+    def in_flight(self):
+        """Bytes written to the channel that the client has not acknowledged yet.
+
+        That is output still queued here, in the TCP path or unread by the
+        client: sent minus the client's SSH window adjusts.  asyncssh's public
+        get_write_buffer_size() only counts output queued *beyond* the client's
+        window (about 2 MB for OpenSSH), so it stays 0 while a slow client's
+        backlog piles up in the transport.  The window left is read from the
+        channel's private _send_window; should that go away, this falls back
+        to the public (late) count.
+        """
+        chan = self.proc.channel
+        left = getattr(chan, "_send_window", None)
+        if left is None or self.window is None:
+            return chan.get_write_buffer_size()
+        return max(0, self.window - left) + chan.get_write_buffer_size()
+
+    def backed_up(self, in_flight):
+        """Whether `in_flight` bytes are too many to send another frame.
+
+        Clients acknowledge in batches (OpenSSH about every 96 KB consumed,
+        asyncssh every half window), so the marks sit WRITE_HIGH (WRITE_LOW
+        after a hold) above the largest batch seen, or above half the client's
+        window until one has been.
+        """
+        self.ack_batch = max(self.ack_batch, self.last_in_flight - in_flight)
+        self.last_in_flight = in_flight
+        batch = self.ack_batch or (self.window or 0) // 2
+        return in_flight > batch + (WRITE_LOW if self.pending else WRITE_HIGH)
+
+    def hold(self, in_flight, dropped=True):
+        """Skip a frame (counted if `dropped`) while `in_flight` bytes await the client.
+
+        The session stops drawing until the client has acknowledged enough to
+        pass backed_up() again; the clock then sends its latest state once.  A
+        backlog with nothing acknowledged for STUCK_AFTER seconds ends the session.
+        """
+        self.dropped += dropped
+        self.pending = True
+        self.peak_in_flight = max(self.peak_in_flight, in_flight)
+        now, drained = time.monotonic(), self.sent - in_flight
+        if self.blocked_since is None or drained > self.drained:
+            self.blocked_since, self.drained = now, drained
+        elif now - self.blocked_since > STUCK_AFTER:
+            self.disconnect(f"output stuck for {STUCK_AFTER:.0f}s")
+
+    def disconnect(self, reason):
+        print(f"  {A.YL}!{A.R} {reason}, closing session ({self.in_flight()} bytes in flight)", flush=True)
+        CLOCK.sessions.discard(self)
+        self.proc.channel.get_connection().abort()
+
+    def memory(self):
+        """Approximate bytes held for this session: unacknowledged output (an
+        upper bound on what is still buffered server-side) plus screen."""
+        return self.in_flight() + sum(map(len, self.screen.lines or ()))
+
+    def stats(self):
+        return {"sent": self.sent, "frames": self.frames, "dropped": self.dropped,
+                "in_flight": self.in_flight(),
+                "peak_in_flight": self.peak_in_flight, "memory": self.memory()}
 
     def _key(self, k: bytes) -> bool:
         if k in (b"q", b"Q"):
             return False
+        self._sync()
+        if k == b"\x0c":  # Ctrl+L: redraw everything
+            self.screen.invalidate()
+            return True
 
         if self.state == "intro":
             # skip intro
@@ -653,12 +960,13 @@ class Session:
                 pass  # stay on splash
 
         elif self.state == "archive":
-            if k == b"\x1b[A":
-                self.sel = (self.sel - 1) % SHOW_COUNT
-            elif k == b"\x1b[B":
-                self.sel = (self.sel + 1) % SHOW_COUNT
-            elif k in (b"\r", b"\n", b"\x1b[C"):  # enter or right arrow
-                self.detail = FLAT[SHOW_IDXS[self.sel]][1]
+            count = self.catalog.count
+            if k == b"\x1b[A" and count:
+                self.sel = (self.sel - 1) % count
+            elif k == b"\x1b[B" and count:
+                self.sel = (self.sel + 1) % count
+            elif k in (b"\r", b"\n", b"\x1b[C") and count:  # enter or right arrow
+                self.detail = self.catalog.show(self.sel)
                 self.state  = "detail"
                 self.show_url_popup = False
             elif k in (b"\x1b", b"\x1b[D"):  # esc or left arrow
@@ -666,11 +974,10 @@ class Session:
 
         elif self.state == "detail":
             if k in (b"t", b"T"):
-                global _now_playing
                 if _now_playing and _now_playing["id"] == self.detail["id"]:
-                    _now_playing = None
+                    set_now_playing(None)
                 else:
-                    _now_playing = self.detail
+                    set_now_playing(self.detail)
             elif k in (b"o", b"O"):
                 self.show_url_popup = not self.show_url_popup
             elif k in (b"\x1b", b"\x1b[D"):
@@ -691,13 +998,13 @@ class Session:
         global _listeners
         _listeners += 1
         self._draw()
+        CLOCK.sessions.add(self)
         try:
             while True:
                 try:
-                    raw = await asyncio.wait_for(
-                        self.proc.stdin.read(16), timeout=0.5 if self.state in ("intro", "splash", "detail") else 5.0
-                    )
-                except asyncio.TimeoutError:
+                    raw = await self.proc.stdin.read(16)
+                except asyncssh.TerminalSizeChanged as size:
+                    self.screen.resize(size.width, size.height)
                     self._draw()
                     continue
 
@@ -706,6 +1013,7 @@ class Session:
 
                 if isinstance(raw, str):
                     raw = raw.encode()
+                self.last_key = time.monotonic()
 
                 if raw == b"\x1b":
                     try:
@@ -716,6 +1024,8 @@ class Session:
                             raw += more if isinstance(more, bytes) else more.encode()
                     except asyncio.TimeoutError:
                         pass
+                    except asyncssh.TerminalSizeChanged as size:
+                        self.screen.resize(size.width, size.height)
 
                 alive = True
                 for k in _parse_all(raw):
@@ -729,6 +1039,7 @@ class Session:
         except (asyncio.CancelledError, ConnectionError, OSError):
             pass
         finally:
+            CLOCK.sessions.discard(self)
             _listeners -= 1
             try:
                 self.proc.stdout.write(A.SHW + A.CLR)
@@ -736,6 +1047,72 @@ class Session:
             except Exception:
                 pass
 
+# ─── animation clock ─────────────────────────────────────────────────────────
+class AnimationClock:
+    """One server-wide ticker for the animated pages (intro, splash, detail).
+
+    Each tick renders every distinct animated page once and fans it out to
+    the sessions showing it.  Sessions idle for IDLE_AFTER seconds only get
+    every FPS/IDLE_FPS-th tick, and a session with too many bytes in flight
+    (a slow or high-latency link, see Session.in_flight()) has the tick's
+    frame dropped until it catches up (see Session.hold()).
+    """
+
+    ANIMATED = ("intro", "splash", "detail")
+
+    def __init__(self, fps=FPS, idle_fps=IDLE_FPS):
+        self.fps, self.idle_fps = fps, idle_fps
+        self.frame = 0
+        self.sessions = set()
+
+    def tick(self):
+        self.frame += 1
+        idle_every = max(1, round(self.fps / self.idle_fps)) if self.idle_fps > 0 else 0
+        idle_since = time.monotonic() - IDLE_AFTER
+        renders, diffs = {}, {}
+        for session in list(self.sessions):
+            in_flight = session.in_flight()
+            if session.backed_up(in_flight):
+                session.hold(in_flight, dropped=session.state in self.ANIMATED)
+                continue
+            if not session.pending:     # a held session sends its latest state now
+                if session.state not in self.ANIMATED:
+                    continue
+                if session.last_key < idle_since and (not idle_every or self.frame % idle_every):
+                    continue
+            try:
+                session._draw(renders, diffs)
+            except (ConnectionError, OSError):
+                pass
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.fps
+        due = loop.time()
+        while True:
+            due += interval
+            delay = due - loop.time()
+            if delay < 0:   # fell behind: skip ahead rather than burst
+                due, delay = loop.time(), 0
+            await asyncio.sleep(delay)
+            self.tick()
+
+CLOCK = AnimationClock()
+
+async def report_stats(interval):
+    """Print a line of session output stats every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        stats = [s.stats() for s in CLOCK.sessions]
+        if not stats:
+            continue
+        worst = max(stats, key=lambda st: st["memory"])
+        print(f"  {A.fg(245)}{len(stats)} sessions  "
+              f"{sum(st['sent'] for st in stats) / 1e6:.1f} MB sent  "
+              f"{sum(st['dropped'] for st in stats)} frames dropped  "
+              f"{sum(st['in_flight'] for st in stats) / 1e3:.0f} KB in flight  "
+              f"max session {worst['memory'] / 1e3:.0f} KB{A.R}", flush=True)
+
 # ─── SSH server ──────────────────────────────────────────────────────────────
 class _Server(asyncssh.SSHServer):
     def connection_made(self, conn):
@@ -771,6 +1148,9 @@ async def main():
         os.chmod(str(HOST_KEY), 0o600)
 
     print(BANNER)
+    clock = asyncio.create_task(CLOCK.run())
+    stats = asyncio.create_task(report_stats(STATS_INTERVAL)) if STATS_INTERVAL > 0 else None
+    reload = asyncio.create_task(watch_catalog())
 
     srv = await asyncssh.create_server(
         _Server, "", PORT,
@@ -787,6 +1167,10 @@ async def main():
         await asyncio.Event().wait()
     except (KeyboardInterrupt, asyncio.CancelledError):
         print(f"\n  {A.YL}Shutting down...{A.R}")
+        clock.cancel()
+        reload.cancel()
+        if stats:
+            stats.cancel()
         srv.close()
         await srv.wait_closed()
         print(f"  {A.fg(245)}Goodbye.{A.R}")
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+kloom_store.py  ─  optional SQLite show store  ─  Kloom Lo Kadosh
+
+  Import:  python3 kloom_store.py import [shows.json] [--db PATH]
+  Export:  python3 kloom_store.py export [shows.json] [--db PATH]
+  Use:     KLOOM_DB=data/shows.sqlite python3 generate.py   (or kloom_ssh.py)
+
+Also home of Show, the validated show record both programs load.
+
+data/shows.json stays the default source of truth.  With KLOOM_DB set, both
+generate.py and kloom_ssh.py read shows from the database instead, and
+metadata updates are written one show per transaction rather than rewriting
+the whole JSON file.
+"""
+
+import datetime
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs, unquote
+
+BASE_DIR   = Path(__file__).resolve().parent
+DATA_FILE  = BASE_DIR / 'data' / 'shows.json'
+STORE_FILE = BASE_DIR / 'data' / 'shows.sqlite'
+
+SITE_URL = 'https://willbearfruits.github.io/kloom-radio'
+
+SHOW_TYPES = ('local_audio', 'embed', 'youtube')
+_DATE = re.compile(r'\d{4}-\d\d-\d\d')
+_ID   = re.compile(r'[A-Za-z0-9][A-Za-z0-9_-]*')
+
+def extract_feed_path(embed_url):
+    """The Mixcloud feed path ('/user/show/') in an embed URL's ?feed=, or None."""
+    query = parse_qs(urlparse(embed_url).query)
+    if 'feed' in query:
+        return unquote(query['feed'][0])
+    return None
+
+def _is_text(value):
+    return value is None or isinstance(value, str)
+
+def _is_text_list(value):
+    return value is None or (isinstance(value, list) and all(isinstance(v, str) for v in value))
+
+def _is_count(value):
+    return value is None or (isinstance(value, int) and not isinstance(value, bool))
+
+def _is_any(value):
+    return True
+
+# Known fields, in shows.json order, with their validators
+SHOW_FIELDS = {
+    'id': _is_text, 'title': _is_text, 'series': _is_text, 'date': _is_text,
+    'host': _is_text, 'guest': _is_text, 'tags': _is_text_list, 'genres': _is_text_list,
+    'playlist': _is_any, 'description': _is_text, 'type': _is_text, 'src': _is_text,
+    'embed_url': _is_text, 'image_url': _is_text, 'play_count': _is_count,
+}
+REQUIRED_FIELDS = ('id', 'title', 'series', 'date', 'type')
+DERIVED_FIELDS  = ('listen_url', 'audio_url', 'show_url', 'feed_path', 'badge')
+
+_key_orders = {}   # shared key-order tuples, one per distinct record layout
+
+class Show:
+    """One validated show record, with its derived URLs computed once.
+
+    Fields of the shows.json record are slots (absent fields stay unset, so
+    attribute access fails just as a missing dict key would); unknown keys are
+    kept in ``extra`` and the original key order is remembered, so
+    ``as_dict()`` round-trips the record exactly.  Dict-style access
+    (``show['title']``, ``show.get('guest')``, ``show['tags'] = ...``) works
+    for existing code and templates; set fields that way so the key order
+    and derived values stay in step.
+
+    Derived, read-only: ``show_url``, ``audio_url`` (local audio), ``listen_url``
+    (where a listener can play it), ``feed_path`` (Mixcloud embeds) and
+    ``badge`` (the show type used for list badges).
+
+    Raises ValueError naming the show and field for a malformed record.
+    """
+
+    __slots__ = (*SHOW_FIELDS, *DERIVED_FIELDS, 'extra', '_keys')
+
+    def __init__(self, record):
+        if not isinstance(record, dict):
+            raise ValueError(f"show record must be an object, got {type(record).__name__}")
+        name = repr(record.get('id', '?'))
+        for field in REQUIRED_FIELDS:
+            if not record.get(field) or not isinstance(record[field], str):
+                raise ValueError(f"show {name}: missing required field '{field}'")
+        self.extra = {}
+        for key, value in record.items():
+            if key not in SHOW_FIELDS:
+                self.extra[key] = value
+            elif SHOW_FIELDS[key](value):
+                setattr(self, key, value)
+            else:
+                raise ValueError(f"show {name}: bad value for '{key}': {value!r}")
+        keys = tuple(record)
+        self._keys = _key_orders.setdefault(keys, keys)
+
+        if not _ID.fullmatch(self.id):
+            raise ValueError(f"show {name}: id must be letters, digits, '-' or '_'")
+        if not _DATE.fullmatch(self.date):
+            raise ValueError(f"show {name}: date must be YYYY-MM-DD, got {self.date!r}")
+        try:
+            datetime.date.fromisoformat(self.date)
+        except ValueError:
+            raise ValueError(f"show {name}: date {self.date!r} does not exist") from None
+        if self.type not in SHOW_TYPES:
+            raise ValueError(f"show {name}: type must be one of {', '.join(SHOW_TYPES)}, got {self.type!r}")
+        needs = 'src' if self.type == 'local_audio' else 'embed_url'
+        if not getattr(self, needs, None):
+            raise ValueError(f"show {name}: a {self.type} show needs '{needs}'")
+        self._derive()
+
+    def _derive(self):
+        self.show_url = f'{SITE_URL}/shows/{self.id}.html'
+        self.badge    = self.type
+        if getattr(self, 'src', None):
+            self.audio_url = SITE_URL + '/' + self.src.replace('./', '')
+        feed = None
+        if self.type == 'embed':
+            feed = extract_feed_path(self.embed_url)
+            self.listen_url = 'https://www.mixcloud.com' + feed if feed else self.embed_url
+        elif self.type == 'youtube':
+            self.listen_url = 'https://www.youtube.com/watch?v=' + self.embed_url.rstrip('/').split('/')[-1]
+        else:
+            self.listen_url = self.show_url
+        self.feed_path = feed if feed and 'mixcloud' in self.embed_url else None
+
+    # ── dict-style access ──
+
+    def __getitem__(self, key):
+        if key in SHOW_FIELDS or key in DERIVED_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return self.extra[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self._keys or (key in DERIVED_FIELDS and hasattr(self, key))
+
+    def __setitem__(self, key, value):
+        if key in DERIVED_FIELDS:
+            raise KeyError(f"'{key}' is derived from the show's fields")
+        if key in SHOW_FIELDS:
+            if not SHOW_FIELDS[key](value):
+                raise ValueError(f"show {self.id!r}: bad value for '{key}': {value!r}")
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+        if key not in self._keys:
+            keys = self._keys + (key,)
+            self._keys = _key_orders.setdefault(keys, keys)
+        if key in ('id', 'type', 'src', 'embed_url'):
+            self._derive()
+
+    def as_dict(self, derived=False):
+        """The shows.json record; with ``derived``, plus audio_url / show_url for the web player."""
+        record = {key: self[key] for key in self._keys}
+        if derived:
+            if getattr(self, 'audio_url', None):
+                record['audio_url'] = self.audio_url
+            record['show_url'] = self.show_url
+        return record
+
+    def __repr__(self):
+        return f'<Show {self.id}>'
+
+def load_shows(records):
+    """Validate a list of show records into Show objects; ValueError on the first bad one."""
+    if not isinstance(records, list):
+        raise ValueError("show data must be a list of show records")
+    shows, seen = [], set()
+    for n, record in enumerate(records, 1):
+        try:
+            show = Show(record)
+        except ValueError as e:
+            raise ValueError(f"record #{n}: {e}") from None
+        if show.id in seen:
+            raise ValueError(f"record #{n}: duplicate show id {show.id!r}")
+        seen.add(show.id)
+        shows.append(show)
+    return shows
+
+class ShowList:
+    """ShowStore's read API over shows already in memory (the shows.json backend).
+
+    Lets callers query shows the same way whichever backend is in use, with
+    the same ordering: newest first, same-day shows in file order.
+    """
+
+    def __init__(self, shows):
+        self.shows  = list(shows)
+        self.newest = sorted(self.shows, key=lambda s: s['date'], reverse=True)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def all(self):
+        """Every show, in file order."""
+        return list(self.shows)
+
+    def get(self, show_id):
+        """One show by id, or None."""
+        return next((s for s in self.shows if s['id'] == show_id), None)
+
+    def latest(self, limit=None):
+        """The `limit` newest shows (every show, newest first, without a limit)."""
+        return self.newest[:limit]
+
+    def by_series(self, *series):
+        """Shows in any of the given series, newest first."""
+        return [s for s in self.newest if s.get('series') in series]
+
+    def by_tag(self, tag):
+        """Shows carrying `tag` (case-insensitive), newest first."""
+        tag = tag.lower()
+        return [s for s in self.newest if any(t.lower() == tag for t in s.get('tags') or ())]
+
+    def count(self):
+        return len(self.shows)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shows (
+    id         TEXT PRIMARY KEY,
+    position   INTEGER NOT NULL,   -- order in shows.json, kept for export
+    date       TEXT,
+    series     TEXT,
+    type       TEXT,
+    data       TEXT NOT NULL,      -- the full show record as JSON
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS show_tags (
+    show_id TEXT NOT NULL REFERENCES shows(id) ON DELETE CASCADE,
+    tag     TEXT NOT NULL,
+    PRIMARY KEY (show_id, tag)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS shows_date   ON shows(date);
+CREATE INDEX IF NOT EXISTS shows_series ON shows(series, date);
+CREATE INDEX IF NOT EXISTS show_tags_tag ON show_tags(tag COLLATE NOCASE);
+"""
+
+def store_path():
+    """The database named by $KLOOM_DB, or None when the JSON file is in use."""
+    path = os.environ.get('KLOOM_DB')
+    if not path:
+        return None
+    path = Path(path)
+    return path if path.is_absolute() else BASE_DIR / path
+
+class ShowStore:
+    """Show records in SQLite, queried by date, series and tag.
+
+    Queries return Show objects, newest first (same-day shows in file
+    order).  Records round-trip unchanged: each row keeps the full show
+    record as JSON next to the indexed columns.  Every write runs in its own
+    transaction and bumps a revision counter that readers can poll to notice
+    changes.
+
+    With readonly=True an existing database is opened without creating it,
+    switching its journal mode or applying the schema; writes then fail.
+    """
+
+    def __init__(self, path=STORE_FILE, readonly=False):
+        self.path = Path(path)
+        if readonly:
+            self.db = sqlite3.connect(f'{self.path.resolve().as_uri()}?mode=ro', uri=True, isolation_level=None)
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA foreign_keys=ON')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── reads ──
+
+    def _shows(self, where='', params=(), order='date DESC, position', limit=None):
+        sql = f'SELECT data FROM shows {where} ORDER BY {order}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return load_shows([json.loads(row[0]) for row in self.db.execute(sql, params)])
+
+    def all(self):
+        """Every show, in shows.json order (what load_data would return)."""
+        return self._shows(order='position')
+
+    def get(self, show_id):
+        """One show by id, or None."""
+        shows = self._shows('WHERE id = ?', (show_id,))
+        return shows[0] if shows else None
+
+    def latest(self, limit=None):
+        """The `limit` newest shows (every show, newest first, without a limit)."""
+        return self._shows(limit=limit)
+
+    def by_series(self, *series):
+        """Shows in any of the given series, newest first."""
+        marks = ', '.join('?' * len(series))
+        return self._shows(f'WHERE series IN ({marks})', series)
+
+    def by_tag(self, tag):
+        """Shows carrying `tag` (case-insensitive), newest first."""
+        return self._shows('WHERE id IN (SELECT show_id FROM show_tags WHERE tag = ? COLLATE NOCASE)', (tag,))
+
+    def count(self):
+        return self.db.execute('SELECT COUNT(*) FROM shows').fetchone()[0]
+
+    def revision(self):
+        """Counter bumped by every write; equal values mean identical contents."""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    # ── writes ──
+
+    def _write(self, show, position=None):
+        if not isinstance(show, Show):
+            show = Show(show)
+        if position is None:
+            row = self.db.execute('SELECT position FROM shows WHERE id = ?', (show['id'],)).fetchone()
+            position = row[0] if row else self.db.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM shows').fetchone()[0]
+        self.db.execute(
+            'INSERT OR REPLACE INTO shows (id, position, date, series, type, data, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (show['id'], position, show.get('date'), show.get('series'), show.get('type'),
+             json.dumps(show.as_dict(), ensure_ascii=False), time.time()))
+        self.db.execute('DELETE FROM show_tags WHERE show_id = ?', (show['id'],))
+        self.db.executemany('INSERT OR IGNORE INTO show_tags (show_id, tag) VALUES (?, ?)',
+                            [(show['id'], tag) for tag in show.get('tags') or []])
+
+    def _bump(self):
+        self.db.execute("INSERT INTO meta (key, value) VALUES ('revision', 1) "
+                        "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+
+    def put(self, show):
+        """Insert or replace one show (a Show or a record dict) in a single transaction."""
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self._write(show)
+            self._bump()
+
+    def delete(self, show_id):
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.execute('DELETE FROM shows WHERE id = ?', (show_id,))
+            self._bump()
+
+    # ── JSON import / export ──
+
+    def import_json(self, path=DATA_FILE):
+        """Replace the store's contents with shows.json, atomically.
+
+        Every record is validated first; a bad one aborts the import.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            shows = load_shows(json.load(f))
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.execute('DELETE FROM shows')
+            for position, show in enumerate(shows):
+                self._write(show, position)
+            self._bump()
+        return len(shows)
+
+    def export_json(self, path=DATA_FILE):
+        """Write the store as shows.json, in its original order and format."""
+        shows = self.all()
+        tmp = Path(path).with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump([show.as_dict() for show in shows], f, indent=4, ensure_ascii=False)
+            f.write('\n')
+        os.replace(tmp, path)
+        return len(shows)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    db = store_path() or STORE_FILE
+    if "--db" in args:
+        i = args.index("--db")
+        db = Path(args[i + 1])
+        del args[i:i + 2]
+    if not args or args[0] not in ('import', 'export'):
+        print(__doc__.strip())
+        sys.exit(2)
+    json_file = Path(args[1]) if len(args) > 1 else DATA_FILE
+    try:
+        with ShowStore(db) as store:
+            if args[0] == 'import':
+                print(f"Imported {store.import_json(json_file)} shows from {json_file} into {db}")
+            else:
+                print(f"Exported {store.export_json(json_file)} shows from {db} to {json_file}")
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)